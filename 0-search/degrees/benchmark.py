@@ -0,0 +1,174 @@
+"""
+Benchmarks for the degrees storage engines and search.
+
+Usage: python benchmark.py load [directory]
+       python benchmark.py search [directory] [--pairs N] [--seed S]
+       python benchmark.py frontier [--sizes N ...]
+       python benchmark.py parallel [directory] [--pairs N] [--processes N ...]
+"""
+import argparse
+import multiprocessing
+import random
+import resource
+import statistics
+import time
+import tracemalloc
+
+import degrees
+import parallel
+import util
+
+
+def measure_load(directory, compact, trace):
+    """
+    Loads `directory` with one engine and returns (seconds, peak RSS in MB,
+    retained heap in MB or None). Runs in a fresh process so engines don't
+    share memory.
+    """
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    degrees.load_data(directory, compact=compact)
+    elapsed = time.perf_counter() - start
+    retained = None
+    if trace:
+        retained = tracemalloc.get_traced_memory()[0] / 2**20
+        tracemalloc.stop()
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return elapsed, peak_rss, retained
+
+
+def in_child(func, *args):
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(1) as pool:
+        return pool.apply(func, args)
+
+
+def bench_load(args):
+    print(f"{'engine':<8} {'load (s)':>9} {'peak RSS (MB)':>14} "
+          f"{'retained (MB)':>14}")
+    for name, compact in (("dict", False), ("compact", True)):
+        elapsed, peak_rss, _ = in_child(
+            measure_load, args.directory, compact, False)
+        _, _, retained = in_child(measure_load, args.directory, compact, True)
+        print(f"{name:<8} {elapsed:>9.2f} {peak_rss:>14.1f} {retained:>14.1f}")
+
+
+def bench_search(args):
+    degrees.load_data(args.directory, compact=args.compact)
+    rng = random.Random(args.seed)
+    population = list(degrees.people)
+    pairs = [tuple(rng.sample(population, 2)) for _ in range(args.pairs)]
+
+    searches = (("bfs", degrees.shortest_path),
+                ("bidirectional", degrees.shortest_path_bidirectional))
+    lengths = {}
+    print(f"{len(pairs)} random pairs")
+    print(f"{'search':<14} {'total (s)':>10} {'median (ms)':>12} "
+          f"{'p95 (ms)':>9} {'max (ms)':>9}")
+    for name, search in searches:
+        times = []
+        for source, target in pairs:
+            start = time.perf_counter()
+            path = search(source, target)
+            times.append((time.perf_counter() - start) * 1000)
+            lengths.setdefault((source, target), set()).add(
+                None if path is None else len(path))
+        times.sort()
+        p95 = times[int(0.95 * (len(times) - 1))]
+        print(f"{name:<14} {sum(times) / 1000:>10.2f} "
+              f"{statistics.median(times):>12.2f} {p95:>9.2f} "
+              f"{times[-1]:>9.2f}")
+
+    mismatches = sum(1 for found in lengths.values() if len(found) > 1)
+    if mismatches:
+        print(f"{mismatches} pairs got paths of different lengths")
+
+
+def bench_frontier(args):
+    frontiers = (
+        ("StackFrontier", util.StackFrontier),
+        ("DequeStackFrontier", util.DequeStackFrontier),
+        ("QueueFrontier", util.QueueFrontier),
+        ("DequeQueueFrontier", util.DequeQueueFrontier),
+        ("PriorityFrontier", lambda: util.PriorityFrontier(
+            lambda node: node.action)),
+    )
+    print(f"{'frontier':<20} {'size':>8} {'add+remove (ms)':>16} "
+          f"{'1k contains (ms)':>17}")
+    for size in args.sizes:
+        nodes = [util.Node(i, None, (i * 7919) % size) for i in range(size)]
+        for name, frontier_type in frontiers:
+            frontier = frontier_type()
+            start = time.perf_counter()
+            for node in nodes:
+                frontier.add(node)
+            fill = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for state in range(0, size, max(1, size // 1000)):
+                frontier.contains_state(state)
+            contains = time.perf_counter() - start
+
+            start = time.perf_counter()
+            while not frontier.empty():
+                frontier.remove()
+            drain = time.perf_counter() - start
+            print(f"{name:<20} {size:>8} {(fill + drain) * 1000:>16.2f} "
+                  f"{contains * 1000:>17.2f}")
+
+
+def bench_parallel(args):
+    degrees.load_data(args.directory, compact=True)
+    rng = random.Random(args.seed)
+    population = list(degrees.people)
+    pairs = [tuple(rng.sample(population, 2)) for _ in range(args.pairs)]
+
+    print(f"{len(pairs)} random pairs on {multiprocessing.cpu_count()} cores")
+    print(f"{'processes':>9} {'total (s)':>10} {'queries/s':>10} "
+          f"{'speedup':>8}")
+    baseline = None
+    for processes in args.processes:
+        start = time.perf_counter()
+        for _ in parallel.run_queries(args.directory, pairs, processes):
+            pass
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{processes:>9} {elapsed:>10.2f} {len(pairs) / elapsed:>10.1f} "
+              f"{baseline / elapsed:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    load = commands.add_parser("load", help="load time and memory per engine")
+    load.add_argument("directory", nargs="?", default="large")
+    load.set_defaults(func=bench_load)
+
+    search = commands.add_parser("search", help="BFS vs bidirectional BFS")
+    search.add_argument("directory", nargs="?", default="large")
+    search.add_argument("--pairs", type=int, default=100)
+    search.add_argument("--seed", type=int, default=0)
+    search.add_argument("--compact", action="store_true")
+    search.set_defaults(func=bench_search)
+
+    frontier = commands.add_parser("frontier",
+                                   help="frontier micro-benchmarks")
+    frontier.add_argument("--sizes", type=int, nargs="+",
+                          default=[1000, 10000, 100000])
+    frontier.set_defaults(func=bench_frontier)
+
+    par = commands.add_parser("parallel", help="process pool scaling")
+    par.add_argument("directory", nargs="?", default="large")
+    par.add_argument("--pairs", type=int, default=1000)
+    par.add_argument("--seed", type=int, default=0)
+    par.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4])
+    par.set_defaults(func=bench_parallel)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
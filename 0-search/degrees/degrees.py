@@ -1,7 +1,15 @@
+import argparse
 import csv
+import json
+import math
+import re
 import sys
 
-from util import Node, StackFrontier, QueueFrontier
+from graph import CompactGraph, load_cached
+from ingest import Progress
+from landmarks import load_index, profile_bounds
+from nameindex import NameIndex
+from util import Node, DequeQueueFrontier, SearchStats
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -12,11 +20,51 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Exact, prefix and fuzzy name search over people
+name_index = None
 
-def load_data(directory):
+# Whether only the people near some seeds were loaded, which makes
+# landmark distances (over the full graph) invalid bounds
+seeded = False
+
+
+def load_data(directory, compact=False, cache=True, seeds=None, hops=None,
+              progress=False, memory_limit=None):
     """
     Load data from CSV files into memory.
+
+    With `compact`, the data is held in a `CompactGraph` (interned IDs and
+    CSR adjacency arrays) and `names`, `people` and `movies` become
+    read-only views over it instead of dicts. Unless `cache` is False, the
+    compact graph is memory-mapped from `degrees.snapshot` in `directory`,
+    which is (re)written whenever the CSVs' size or mtime change.
+
+    The compact graph is read by the streaming pipeline in `ingest.py`,
+    which can report rows/second and peak RSS (`progress`), give up past
+    `memory_limit` megabytes, and load only the people within `hops`
+    degrees of the `seeds` person IDs. Any of these implies `compact`,
+    and `seeds` bypasses the snapshot.
     """
+    global names, people, movies, name_index, seeded
+    options = {}
+    seeded = seeds is not None
+    if progress or memory_limit is not None:
+        options["progress"] = Progress(
+            stream=sys.stderr if progress else None,
+            memory_limit=memory_limit)
+        compact = True
+    if seeds is not None:
+        options.update(seeds=seeds, hops=hops)
+        compact, cache = True, False
+    if compact:
+        if cache:
+            graph = load_cached(directory, **options)
+        else:
+            graph = CompactGraph.from_csv(directory, **options)
+        names, people, movies = graph.names, graph.people, graph.movies
+        name_index = NameIndex.from_graph(graph)
+        return
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -51,16 +99,88 @@ def load_data(directory):
             except KeyError:
                 pass
 
+    name_index = NameIndex.from_people(people)
+
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--compact", action="store_true",
+                        help="use the compact integer-indexed graph store")
+    parser.add_argument("--no-cache", dest="cache", action="store_false",
+                        help="with --compact, always re-parse the CSVs")
+    parser.add_argument("--bidirectional", action="store_true",
+                        help="search from both people at once")
+    batch = parser.add_mutually_exclusive_group()
+    batch.add_argument("--targets", metavar="FILE",
+                       help="with --source, a file of target person IDs "
+                            "(one per line); prints JSON lines")
+    batch.add_argument("--pairs", metavar="FILE",
+                       help="a CSV file of source,target person IDs; "
+                            "prints JSON lines")
+    parser.add_argument("--source", metavar="ID",
+                        help="source person ID for --targets")
+    parser.add_argument("--landmarks", action="store_true",
+                        help="prune the search with the landmark index "
+                             "built by landmarks.py")
+    parser.add_argument("--estimate", action="store_true",
+                        help="only print landmark bounds on the degrees")
+    parser.add_argument("--seed", metavar="ID", action="append",
+                        help="only load people near this person ID "
+                             "(repeatable)")
+    parser.add_argument("--hops", type=int, default=None,
+                        help="with --seed, how many degrees out to load")
+    parser.add_argument("--progress", action="store_true",
+                        help="report rows/second and peak RSS while loading")
+    parser.add_argument("--memory-limit", type=float, metavar="MB",
+                        help="give up loading past this peak RSS")
+    parser.add_argument("--stats", action="store_true",
+                        help="print search statistics, then the same as JSON")
+    args = parser.parse_args()
+    if args.targets and not args.source:
+        parser.error("--targets requires --source")
+    if args.stats and (args.targets or args.pairs):
+        parser.error("--stats can't be combined with --targets or --pairs")
+    if args.seed and (args.landmarks or args.estimate):
+        parser.error("--landmarks and --estimate use distances over the "
+                     "full graph, so can't be combined with --seed")
+    batch_mode = args.targets or args.pairs
 
     # Load data from files into memory
-    print("Loading data...")
-    load_data(directory)
-    print("Data loaded.")
+    log = sys.stderr if batch_mode else sys.stdout
+    print("Loading data...", file=log)
+    try:
+        load_data(args.directory, compact=args.compact, cache=args.cache,
+                  seeds=args.seed, hops=args.hops, progress=args.progress,
+                  memory_limit=args.memory_limit)
+    except MemoryError as e:
+        sys.exit(str(e))
+    print("Data loaded.", file=log)
+
+    index = None
+    if args.landmarks or args.estimate:
+        index = load_index(args.directory)
+        if index is None:
+            sys.exit("No up-to-date landmark index; "
+                     "run python landmarks.py first.")
+
+    if batch_mode:
+        if args.targets:
+            with open(args.targets, encoding="utf-8") as f:
+                pairs = [(args.source, line.strip()) for line in f
+                         if line.strip()]
+        else:
+            with open(args.pairs, encoding="utf-8", newline="") as f:
+                pairs = [(row[0].strip(), row[1].strip())
+                         for row in csv.reader(f) if row]
+        for source, target, path in batch_paths(pairs):
+            print(json.dumps({
+                "source": source,
+                "target": target,
+                "degrees": None if path is None else len(path),
+                "path": path
+            }), flush=True)
+        return
 
     source = person_id_for_name(input("Name: "))
     if source is None:
@@ -69,7 +189,23 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    if args.estimate:
+        lower, upper = index.bounds(source, target)
+        if lower == math.inf:
+            print("Not connected.")
+        elif upper == math.inf:
+            # Neither person is connected to any landmark, so the index
+            # cannot tell whether they are connected to each other
+            print("Not connected to any landmark.")
+        else:
+            print(f"Between {lower} and {upper} degrees of separation.")
+        return
+
+    stats = SearchStats() if args.stats else None
+    if args.bidirectional:
+        path = shortest_path_bidirectional(source, target, stats=stats)
+    else:
+        path = shortest_path(source, target, landmarks=index, stats=stats)
 
     if path is None:
         print("Not connected.")
@@ -83,37 +219,91 @@ def main():
             movie = movies[path[i + 1][0]]["title"]
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
+    if stats is not None:
+        print(stats)
+        print(json.dumps(stats.to_dict()))
 
-def shortest_path(source, target):
+
+def shortest_path(source, target, landmarks=None, stats=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
     If no possible path, returns None.
+
+    With a `LandmarkIndex`, pairs the index proves unconnected are
+    rejected without searching, and people whose lower bound shows they
+    cannot lie on a path within the index's upper bound are not expanded.
+
+    The index is ignored when only the people near some seeds were loaded,
+    since its full-graph distances don't bound paths within them.
+
+    A `SearchStats` passed as `stats` is filled in as the search runs.
     """
+    if stats is not None:
+        stats.start()
+    if seeded:
+        landmarks = None
+    if landmarks is not None:
+        target_profile = landmarks.profile(target)
+        lower, upper = profile_bounds(
+            landmarks.profile(source), target_profile)
+        if lower == math.inf:
+            if stats is not None:
+                stats.finish()
+            return None
+    depths = {source: 0}
     searched_movies = set()
     searched_people = set()
-    search_list = QueueFrontier()
+    search_list = DequeQueueFrontier()
     search_list.add(Node(source,None,None))
     searched_movies
     searched_people.add(source)
     find = False
     cur_node = Node(None,None,None)
     while not search_list.empty():
+        if stats is not None:
+            stats.frontier_size(len(search_list.frontier))
         cur_node = search_list.remove()
+        depth = depths[cur_node.state] + 1
+        if stats is not None and depth - 1 > stats.depth:
+            stats.next_layer()
         
         attend_movies = people[cur_node.state]["movies"]
         if cur_node.state == target:
             find = True
             break
+        scanned_movies = scanned_people = 0
         for cur_movie in attend_movies:
             if cur_movie not in searched_movies:
                 searched_movies.add(cur_movie)
+                scanned_movies += 1
                 for cur_people in movies[cur_movie]["stars"]:
+                    scanned_people += 1
                     if cur_people not in searched_people:
                         searched_people.add(cur_people)
+                        if landmarks is not None:
+                            # Nobody but the target is worth queueing at the
+                            # upper bound; before that, drop people whose
+                            # lower bound already overshoots it
+                            if depth >= upper and cur_people != target:
+                                continue
+                            if depth < upper - 1:
+                                lower, _ = profile_bounds(
+                                    landmarks.profile(cur_people),
+                                    target_profile)
+                                if depth + lower > upper:
+                                    continue
+                        depths[cur_people] = depth
                         search_list.add(Node(cur_people,cur_node,cur_movie))
+        if stats is not None:
+            stats.expanded(cur_node.state, scanned_movies, scanned_people)
         
+    if stats is not None:
+        if not find:
+            # The last layer was expanded in full without reaching target
+            stats.next_layer()
+        stats.finish()
     ret = []
     if find:
         while cur_node.parent is not None:
@@ -124,15 +314,200 @@ def shortest_path(source, target):
     else:
         return None
 
-def person_id_for_name(name):
+def shortest_path_bidirectional(source, target, stats=None):
+    """
+    Returns the same kind of path as `shortest_path`, but grows breadth-first
+    layers from both `source` and `target`, always expanding the side with
+    the smaller frontier, and joins the two halves where they meet.
+
+    If no possible path, returns None.
+
+    A `SearchStats` passed as `stats` is filled in as the search runs,
+    counting the layers of both sides towards its depth, including the
+    one where they meet.
+    """
+    if stats is not None:
+        stats.start()
+    if source == target:
+        if stats is not None:
+            stats.finish()
+        return []
+
+    # Each side maps the people it reached to the (movie_id, person_id)
+    # step leading back towards its own root
+    forward = {source: None}
+    backward = {target: None}
+    forward_movies = set()
+    backward_movies = set()
+    forward_layer = [source]
+    backward_layer = [target]
+    meet = None
+    while forward_layer and backward_layer and meet is None:
+        if stats is not None:
+            stats.frontier_size(len(forward_layer) + len(backward_layer))
+        if len(forward_layer) <= len(backward_layer):
+            forward_layer, meet = expand_layer(
+                forward_layer, forward, forward_movies, backward, stats)
+        else:
+            backward_layer, meet = expand_layer(
+                backward_layer, backward, backward_movies, forward, stats)
+        if stats is not None:
+            stats.next_layer()
+    if stats is not None:
+        stats.finish()
+    if meet is None:
+        return None
+    return join_paths(meet, forward, backward)
+
+
+def expand_layer(layer, reached, searched_movies, other, stats=None):
+    """
+    Expands one breadth-first layer of a bidirectional search.
+    Returns the next layer and the first person also reached by the
+    `other` side, or None. Since both sides are expanded a whole layer at
+    a time, the first meeting already lies on a shortest path.
+    """
+    next_layer = []
+    for person_id in layer:
+        scanned_movies = scanned_people = 0
+        for movie_id in people[person_id]["movies"]:
+            if movie_id in searched_movies:
+                continue
+            searched_movies.add(movie_id)
+            scanned_movies += 1
+            for star in movies[movie_id]["stars"]:
+                scanned_people += 1
+                if star not in reached:
+                    reached[star] = (movie_id, person_id)
+                    if star in other:
+                        if stats is not None:
+                            stats.expanded(
+                                person_id, scanned_movies, scanned_people)
+                        return next_layer, star
+                    next_layer.append(star)
+        if stats is not None:
+            stats.expanded(person_id, scanned_movies, scanned_people)
+    return next_layer, None
+
+
+def join_paths(meet, forward, backward):
+    """
+    Joins the source -> meet and meet -> target halves of a bidirectional
+    search into a list of (movie_id, person_id) pairs.
+    """
+    path = []
+    person_id = meet
+    while forward[person_id] is not None:
+        movie_id, previous = forward[person_id]
+        path.append((movie_id, person_id))
+        person_id = previous
+    path.reverse()
+    person_id = meet
+    while backward[person_id] is not None:
+        movie_id, person_id = backward[person_id]
+        path.append((movie_id, person_id))
+    return path
+
+
+def paths_from(source, targets):
+    """
+    Runs a single breadth-first search from `source`, layer by layer, and
+    yields (target, path) for each of `targets` as soon as its layer is
+    reached, with paths as returned by `shortest_path`. Targets that are
+    not connected to `source` are yielded last, with a path of None.
+    """
+    remaining = set(targets)
+    if source not in people:
+        for target in remaining:
+            yield target, None
+        return
+
+    # Maps each reached person to the (movie_id, person_id) step back
+    # towards the source
+    reached = {source: None}
+    searched_movies = set()
+    layer = [source]
+    while layer:
+        for person_id in layer:
+            if person_id in remaining:
+                remaining.remove(person_id)
+                yield person_id, path_to(person_id, reached)
+        if not remaining:
+            return
+        next_layer = []
+        for person_id in layer:
+            for movie_id in people[person_id]["movies"]:
+                if movie_id in searched_movies:
+                    continue
+                searched_movies.add(movie_id)
+                for star in movies[movie_id]["stars"]:
+                    if star not in reached:
+                        reached[star] = (movie_id, person_id)
+                        next_layer.append(star)
+        layer = next_layer
+    for target in remaining:
+        yield target, None
+
+
+def path_to(person_id, reached):
+    """
+    Follows `reached` steps back to the search root and returns the
+    list of (movie_id, person_id) pairs leading to `person_id`.
+    """
+    path = []
+    while reached[person_id] is not None:
+        movie_id, previous = reached[person_id]
+        path.append((movie_id, person_id))
+        person_id = previous
+    path.reverse()
+    return path
+
+
+def batch_paths(pairs):
+    """
+    Answers many (source, target) queries, running one breadth-first
+    search per distinct source. Yields (source, target, path) grouped by
+    source; repeated pairs are answered once per occurrence.
+    """
+    by_source = {}
+    for source, target in pairs:
+        targets = by_source.setdefault(source, {})
+        targets[target] = targets.get(target, 0) + 1
+    for source, targets in by_source.items():
+        for target, path in paths_from(source, targets):
+            for _ in range(targets[target]):
+                yield source, target, path
+
+
+def person_id_for_name(name, birth=None, interactive=True):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    If several people share the name, a `birth` year narrows them down
+    first. Remaining ambiguity is resolved by asking, or returns None
+    if not `interactive`. For unknown names, the closest fuzzy matches
+    are printed when `interactive`.
     """
+    name, year = split_birth_year(name)
+    if birth is None:
+        birth = year
     person_ids = list(names.get(name.lower(), set()))
+    if len(person_ids) > 1 and birth is not None:
+        person_ids = [person_id for person_id in person_ids
+                      if people[person_id]["birth"] == str(birth)]
     if len(person_ids) == 0:
+        if interactive and name_index is not None:
+            suggestions = name_index.fuzzy(name, limit=5)
+            if suggestions:
+                print("Did you mean:")
+            for _, person_id in suggestions:
+                person = people[person_id]
+                print(f"    {person['name']} ({person['birth']})")
         return None
     elif len(person_ids) > 1:
+        if not interactive:
+            return None
         print(f"Which '{name}'?")
         for person_id in person_ids:
             person = people[person_id]
@@ -150,6 +525,17 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def split_birth_year(name):
+    """
+    Splits a trailing birth year in parentheses, as in "Kevin Bacon (1958)",
+    off a name. Returns (name, year), with year None if there is none.
+    """
+    match = re.fullmatch(r"\s*(.*?)\s*\((\d{4})\)\s*", name)
+    if match is None:
+        return name, None
+    return match.group(1), match.group(2)
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
@@ -0,0 +1,481 @@
+"""
+Compact, integer-indexed storage for the degrees dataset.
+
+Person and movie IDs are interned to dense integers and the bipartite
+person <-> movie graph is kept as two CSR adjacency structures: an
+`offsets` array per side plus a flat array of neighbor indices, so the
+movies of person `p` are
+`person_movies[person_offsets[p]:person_offsets[p + 1]]`.
+Strings (IDs, names, titles, ...) are packed into `StringTable`s instead
+of living as millions of separate Python objects.
+
+`CompactGraph.people`, `.movies` and `.names` are read-only mappings with
+the same shape as the dicts built by `degrees.load_data`, so the search
+code in `degrees.py` runs on top of either storage engine.
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping, Sequence
+
+# Binary snapshot layout: magic, version, length of a JSON header, the
+# header itself, then each section 8-byte aligned. The header records the
+# source CSV signature and the (offset, size, typecode) of every section.
+SNAPSHOT_MAGIC = b"DEGSNAP\0"
+SNAPSHOT_VERSION = 2
+STRING_FIELDS = ("person_ids", "person_names", "person_births",
+                 "movie_ids", "movie_titles", "movie_years")
+ARRAY_FIELDS = ("person_offsets", "person_movies", "movie_offsets",
+                "movie_stars", "person_order", "movie_order", "name_order",
+                "reversed_name_order")
+
+
+class StringTable(Sequence):
+    """
+    Immutable sequence of strings packed into one UTF-8 buffer.
+    String `i` is `data[offsets[i]:offsets[i + 1]]`.
+    """
+
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, strings):
+        builder = StringTableBuilder()
+        for s in strings:
+            builder.append(s)
+        return builder.build()
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            raise IndexError("string table index out of range")
+        return str(self.data[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+
+class StringTableBuilder():
+    """
+    Accumulates strings for a `StringTable` without keeping them alive.
+    """
+
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = array("q", [0])
+
+    def append(self, s):
+        self.data += s.encode("utf-8")
+        self.offsets.append(len(self.data))
+
+    def build(self):
+        return StringTable(bytes(self.data), self.offsets)
+
+
+def csr(rows, cols, n):
+    """
+    Groups `cols` by `rows` (parallel arrays of edge endpoints, rows in
+    range(n)) and returns the CSR pair (offsets, indices).
+    """
+    offsets = array("i", bytes(4 * (n + 1)))
+    for r in rows:
+        offsets[r + 1] += 1
+    for i in range(n):
+        offsets[i + 1] += offsets[i]
+    indices = array("i", bytes(4 * len(rows)))
+    cursor = offsets[:-1]
+    for r, c in zip(rows, cols):
+        indices[cursor[r]] = c
+        cursor[r] += 1
+    return offsets, indices
+
+
+def sorted_order(table, key=None):
+    """
+    Returns the permutation of indices that sorts `table` (by `key`),
+    used to look strings up with `bisect` instead of a dict.
+    """
+    if key is None:
+        return array("i", sorted(range(len(table)), key=table.__getitem__))
+    return array("i", sorted(range(len(table)),
+                             key=lambda i: key(table[i])))
+
+
+class CompactGraph():
+    """
+    Person <-> movie graph with interned IDs and CSR adjacency arrays.
+    """
+
+    def __init__(self, person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_offsets, person_movies, movie_offsets, movie_stars,
+                 person_order, movie_order, name_order, reversed_name_order):
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_stars = movie_stars
+        self.person_order = person_order
+        self.movie_order = movie_order
+        self.name_order = name_order
+        self.reversed_name_order = reversed_name_order
+
+        self.people = PeopleView(self)
+        self.movies = MoviesView(self)
+        self.names = NamesView(self)
+
+    @classmethod
+    def from_csv(cls, directory, **options):
+        """
+        Builds the graph from `people.csv`, `movies.csv` and `stars.csv`.
+        Stars rows naming unknown people or movies are skipped, and
+        duplicate rows are collapsed, as in `degrees.load_data`.
+        See `ingest.ingest` for the streaming `options`.
+        """
+        # ingest builds on this module, so import it lazily
+        from ingest import ingest
+        return ingest(directory, **options)
+
+    @classmethod
+    def from_edges(cls, person_ids, person_names, person_births,
+                   movie_ids, movie_titles, movie_years,
+                   edge_people, edge_movies):
+        """
+        Builds the graph from string tables and (person, movie) edge arrays.
+        """
+        person_offsets, person_movies = csr(
+            edge_people, edge_movies, len(person_ids))
+        movie_offsets, movie_stars = csr(
+            edge_movies, edge_people, len(movie_ids))
+        return cls(
+            person_ids, person_names, person_births,
+            movie_ids, movie_titles, movie_years,
+            person_offsets, person_movies, movie_offsets, movie_stars,
+            sorted_order(person_ids), sorted_order(movie_ids),
+            sorted_order(person_names, key=str.lower),
+            sorted_order(person_names, key=lambda name: name.lower()[::-1])
+        )
+
+    def save(self, path, source=None):
+        """
+        Writes the graph to a binary snapshot at `path` that `load` can
+        memory-map. `source` is stored in the header for `load` to check.
+        """
+        sections = []
+        for name in STRING_FIELDS:
+            table = getattr(self, name)
+            sections.append((f"{name}.data", "B", table.data))
+            sections.append((f"{name}.offsets", "q", table.offsets))
+        for name in ARRAY_FIELDS:
+            sections.append((name, "i", getattr(self, name)))
+
+        layout = {}
+        position = 0
+        for name, typecode, data in sections:
+            size = memoryview(data).nbytes
+            layout[name] = [position, size, typecode]
+            position = _align(position + size)
+        header = json.dumps({
+            "byteorder": sys.byteorder,
+            "source": source,
+            "sections": layout
+        }).encode("utf-8")
+        base = _align(16 + len(header))
+
+        # Write to a temporary file first so a crash never leaves a
+        # truncated snapshot behind
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(SNAPSHOT_MAGIC)
+            f.write(struct.pack("<II", SNAPSHOT_VERSION, len(header)))
+            f.write(header)
+            for name, typecode, data in sections:
+                f.seek(base + layout[name][0])
+                f.write(data)
+            f.truncate(base + position)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, source=None):
+        """
+        Memory-maps a snapshot written by `save`. Arrays and string tables
+        are views into the mapping, so nothing is parsed or copied.
+
+        Raises ValueError if the file is not a snapshot of this version, if
+        it is truncated, or if `source` is given and differs from the one
+        it was saved with.
+        """
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(buffer)
+        if len(buffer) < 16 or bytes(view[:8]) != SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not a degrees snapshot")
+        version, header_size = struct.unpack("<II", view[8:16])
+        if version != SNAPSHOT_VERSION:
+            raise ValueError(f"{path} has snapshot version {version}")
+        header = json.loads(str(view[16:16 + header_size], "utf-8"))
+        if header["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path} was written on another byte order")
+        if source is not None and header["source"] != source:
+            raise ValueError(f"{path} is out of date")
+
+        # A truncated or padded file must not map to short arrays
+        base = _align(16 + header_size)
+        end = base
+        sections = {}
+        for name, (offset, size, typecode) in header["sections"].items():
+            start = base + offset
+            if (offset < 0 or size < 0 or start + size > len(buffer)
+                    or size % struct.calcsize(typecode)):
+                raise ValueError(f"{path} is truncated or corrupt")
+            sections[name] = view[start:start + size].cast(typecode)
+            end = max(end, base + _align(offset + size))
+        if end != len(buffer):
+            raise ValueError(f"{path} is truncated or corrupt")
+        tables = [
+            StringTable(sections[f"{name}.data"], sections[f"{name}.offsets"])
+            for name in STRING_FIELDS
+        ]
+        graph = cls(*tables, *(sections[name] for name in ARRAY_FIELDS))
+        graph.buffer = buffer
+        return graph
+
+    def person_index(self, person_id):
+        """
+        Returns the dense index of `person_id`, raising KeyError if
+        unknown.
+        """
+        return _lookup(self.person_ids, self.person_order, person_id)
+
+    def movie_index(self, movie_id):
+        """
+        Returns the dense index of `movie_id`, raising KeyError if
+        unknown.
+        """
+        return _lookup(self.movie_ids, self.movie_order, movie_id)
+
+    def movies_of(self, p):
+        """Returns the movie indices person index `p` starred in."""
+        offsets = self.person_offsets
+        return self.person_movies[offsets[p]:offsets[p + 1]]
+
+    def stars_of(self, m):
+        """Returns the person indices who starred in movie index `m`."""
+        offsets = self.movie_offsets
+        return self.movie_stars[offsets[m]:offsets[m + 1]]
+
+    def shortest_path(self, source, target):
+        """
+        Bidirectional breadth-first search between person indices, working
+        directly on the CSR arrays. Returns a shortest list of
+        (movie index, person index) pairs, or None if not connected.
+        """
+        if source == target:
+            return []
+        forward = {source: None}
+        backward = {target: None}
+        forward_movies = set()
+        backward_movies = set()
+        forward_layer = [source]
+        backward_layer = [target]
+        while forward_layer and backward_layer:
+            if len(forward_layer) <= len(backward_layer):
+                forward_layer, meet = self.expand_layer(
+                    forward_layer, forward, forward_movies, backward)
+            else:
+                backward_layer, meet = self.expand_layer(
+                    backward_layer, backward, backward_movies, forward)
+            if meet is not None:
+                path = []
+                p = meet
+                while forward[p] is not None:
+                    m, previous = forward[p]
+                    path.append((m, p))
+                    p = previous
+                path.reverse()
+                p = meet
+                while backward[p] is not None:
+                    m, p = backward[p]
+                    path.append((m, p))
+                return path
+        return None
+
+    def expand_layer(self, layer, reached, searched_movies, other):
+        """
+        Expands one layer of `shortest_path`, returning the next layer and
+        the first person also reached by the `other` side, or None.
+        """
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_stars = self.movie_stars
+        next_layer = []
+        for p in layer:
+            for i in range(person_offsets[p], person_offsets[p + 1]):
+                m = person_movies[i]
+                if m in searched_movies:
+                    continue
+                searched_movies.add(m)
+                for j in range(movie_offsets[m], movie_offsets[m + 1]):
+                    star = movie_stars[j]
+                    if star not in reached:
+                        reached[star] = (m, p)
+                        if star in other:
+                            return next_layer, star
+                        next_layer.append(star)
+        return next_layer, None
+
+    def people_named(self, name):
+        """Returns the person indices whose lowercased name is `name`."""
+        names = self.person_names
+        order = self.name_order
+        i = bisect_left(order, name, key=lambda p: names[p].lower())
+        found = []
+        while i < len(order) and names[order[i]].lower() == name:
+            found.append(order[i])
+            i += 1
+        return found
+
+
+def csv_signature(directory):
+    """
+    Returns the (name, size, mtime) of each source CSV in `directory`,
+    used to tell whether a snapshot is still up to date.
+    """
+    signature = []
+    for name in ("people.csv", "movies.csv", "stars.csv"):
+        stat = os.stat(os.path.join(directory, name))
+        signature.append([name, stat.st_size, stat.st_mtime_ns])
+    return signature
+
+
+def load_cached(directory, path=None, **options):
+    """
+    Returns the graph for `directory`, memory-mapping its snapshot if it
+    matches the CSVs and otherwise rebuilding the graph and the snapshot,
+    passing `options` to `CompactGraph.from_csv`.
+    """
+    if path is None:
+        path = os.path.join(directory, "degrees.snapshot")
+    source = csv_signature(directory)
+    try:
+        return CompactGraph.load(path, source)
+    except (OSError, ValueError):
+        pass
+    graph = CompactGraph.from_csv(directory, **options)
+    try:
+        graph.save(path, source)
+    except OSError:
+        # A read-only data directory just means no cache
+        pass
+    return graph
+
+
+def _align(n):
+    return (n + 7) & ~7
+
+
+def _lookup(table, order, s):
+    i = bisect_left(order, s, key=table.__getitem__)
+    if i == len(order) or table[order[i]] != s:
+        raise KeyError(s)
+    return order[i]
+
+
+class PeopleView(Mapping):
+    """
+    Maps person_ids to a dictionary of: name, birth, movies (movie_ids).
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, person_id):
+        g = self.graph
+        p = g.person_index(person_id)
+        return {
+            "name": g.person_names[p],
+            "birth": g.person_births[p],
+            "movies": tuple(g.movie_ids[m] for m in g.movies_of(p))
+        }
+
+    def __iter__(self):
+        return iter(self.graph.person_ids)
+
+    def __len__(self):
+        return len(self.graph.person_ids)
+
+    def __contains__(self, person_id):
+        try:
+            self.graph.person_index(person_id)
+        except KeyError:
+            return False
+        return True
+
+
+class MoviesView(Mapping):
+    """
+    Maps movie_ids to a dictionary of: title, year, stars (person_ids).
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, movie_id):
+        g = self.graph
+        m = g.movie_index(movie_id)
+        return {
+            "title": g.movie_titles[m],
+            "year": g.movie_years[m],
+            "stars": tuple(g.person_ids[p] for p in g.stars_of(m))
+        }
+
+    def __iter__(self):
+        return iter(self.graph.movie_ids)
+
+    def __len__(self):
+        return len(self.graph.movie_ids)
+
+    def __contains__(self, movie_id):
+        try:
+            self.graph.movie_index(movie_id)
+        except KeyError:
+            return False
+        return True
+
+
+class NamesView(Mapping):
+    """
+    Maps lowercased names to a set of corresponding person_ids.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, name):
+        found = self.graph.people_named(name)
+        if not found:
+            raise KeyError(name)
+        return {self.graph.person_ids[p] for p in found}
+
+    def __iter__(self):
+        names = self.graph.person_names
+        previous = None
+        for p in self.graph.name_order:
+            name = names[p].lower()
+            if name != previous:
+                yield name
+                previous = name
+
+    def __len__(self):
+        return sum(1 for _ in self)
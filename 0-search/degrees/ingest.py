@@ -0,0 +1,216 @@
+"""
+Streaming CSV ingestion for the compact degrees graph.
+
+The CSVs are read in chunks of rows and the graph's string tables and
+edge arrays grow chunk by chunk, so no per-row dicts are kept around.
+Progress (rows/second and peak RSS) can be reported as it goes, loading
+can be aborted past a memory ceiling, and a seed set plus a hop count
+restricts loading to the region of the graph around those people.
+"""
+import csv
+import sys
+import time
+from array import array
+
+from graph import CompactGraph, StringTableBuilder
+
+CHUNK_SIZE = 65536
+
+
+class Progress():
+    """
+    Reports rows read, rows/second and peak RSS to `stream` at most
+    every `interval` seconds, and raises MemoryError once peak RSS
+    exceeds `memory_limit` megabytes (where peak RSS can be measured).
+    """
+
+    def __init__(self, stream=sys.stderr, interval=1.0, memory_limit=None):
+        self.stream = stream
+        self.interval = interval
+        self.memory_limit = memory_limit
+
+    def start(self, label):
+        self.label = label
+        self.rows = 0
+        self.reported_rows = None
+        self.started = self.reported = time.perf_counter()
+
+    def update(self, rows):
+        self.rows += rows
+        if self.memory_limit is not None:
+            peak = peak_rss()
+            if peak is not None and peak > self.memory_limit:
+                raise MemoryError(
+                    f"peak RSS {peak:.0f} MB exceeds the "
+                    f"{self.memory_limit} MB limit while reading {self.label}"
+                )
+        if self.stream is not None and (
+            time.perf_counter() - self.reported >= self.interval
+        ):
+            self.report()
+
+    def finish(self):
+        if self.stream is not None and self.reported_rows != self.rows:
+            self.report()
+
+    def report(self):
+        now = time.perf_counter()
+        rate = self.rows / max(now - self.started, 1e-9)
+        peak = peak_rss()
+        memory = "" if peak is None else f", peak RSS {peak:,.0f} MB"
+        print(f"{self.label}: {self.rows:,} rows, {rate:,.0f} rows/s{memory}",
+              file=self.stream)
+        self.reported = now
+        self.reported_rows = self.rows
+
+
+def peak_rss():
+    """
+    Returns the peak resident set size of this process in megabytes, or
+    None where it cannot be measured (the resource module is Unix-only).
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return rss / (2**20 if sys.platform == "darwin" else 2**10)
+
+
+def read_chunks(path, columns, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Yields lists of up to `chunk_size` rows of `path`, each row a tuple
+    of the named `columns`.
+    """
+    if progress is None:
+        progress = Progress(stream=None)
+    progress.start(path)
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        indices = [header.index(column) for column in columns]
+        chunk = []
+        for row in reader:
+            chunk.append(tuple(row[i] for i in indices))
+            if len(chunk) == chunk_size:
+                progress.update(len(chunk))
+                yield chunk
+                chunk = []
+        if chunk:
+            progress.update(len(chunk))
+            yield chunk
+    progress.finish()
+
+
+def ingest(directory, chunk_size=CHUNK_SIZE, seeds=None, hops=None,
+           progress=None):
+    """
+    Builds a `CompactGraph` from the CSVs in `directory`, chunk by chunk.
+
+    With `seeds` (person IDs), only the people within `hops` degrees of
+    them are loaded, along with the movies that connect them.
+
+    Stars rows naming unknown people or movies are skipped and duplicate
+    rows are collapsed; the number of skipped rows is reported through
+    `progress`.
+    """
+    keep_people = keep_movies = None
+    if seeds is not None:
+        keep_people, keep_movies = reachable(
+            directory, seeds, hops, chunk_size, progress)
+
+    person_index = {}
+    person_ids = StringTableBuilder()
+    person_names = StringTableBuilder()
+    person_births = StringTableBuilder()
+    for chunk in read_chunks(f"{directory}/people.csv",
+                             ("id", "name", "birth"), chunk_size, progress):
+        for person_id, name, birth in chunk:
+            if person_id in person_index or (
+                keep_people is not None and person_id not in keep_people
+            ):
+                continue
+            person_index[person_id] = len(person_index)
+            person_ids.append(person_id)
+            person_names.append(name)
+            person_births.append(birth)
+
+    movie_index = {}
+    movie_ids = StringTableBuilder()
+    movie_titles = StringTableBuilder()
+    movie_years = StringTableBuilder()
+    for chunk in read_chunks(f"{directory}/movies.csv",
+                             ("id", "title", "year"), chunk_size, progress):
+        for movie_id, title, year in chunk:
+            if movie_id in movie_index or (
+                keep_movies is not None and movie_id not in keep_movies
+            ):
+                continue
+            movie_index[movie_id] = len(movie_index)
+            movie_ids.append(movie_id)
+            movie_titles.append(title)
+            movie_years.append(year)
+
+    edge_people = array("i")
+    edge_movies = array("i")
+    seen = set()
+    skipped = 0
+    n_movies = len(movie_index)
+    for chunk in read_chunks(f"{directory}/stars.csv",
+                             ("person_id", "movie_id"), chunk_size, progress):
+        for person_id, movie_id in chunk:
+            p = person_index.get(person_id)
+            m = movie_index.get(movie_id)
+            if p is None or m is None:
+                # Outside the requested region isn't an error
+                if keep_people is None:
+                    skipped += 1
+                continue
+            edge = p * n_movies + m
+            if edge in seen:
+                continue
+            seen.add(edge)
+            edge_people.append(p)
+            edge_movies.append(m)
+    del seen
+    if skipped and progress is not None and progress.stream is not None:
+        print(f"Skipped {skipped:,} stars rows with unknown people or movies.",
+              file=progress.stream)
+
+    return CompactGraph.from_edges(
+        person_ids.build(), person_names.build(), person_births.build(),
+        movie_ids.build(), movie_titles.build(), movie_years.build(),
+        edge_people, edge_movies
+    )
+
+
+def reachable(directory, seeds, hops, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Streams `stars.csv` to find the people within `hops` degrees of the
+    `seeds` (all connected people if `hops` is None) and the movies
+    linking them. Each hop takes two passes. Returns (people, movies) as
+    sets of IDs.
+    """
+    path = f"{directory}/stars.csv"
+    columns = ("person_id", "movie_id")
+    people = set(seeds)
+    movies = set()
+    frontier = set(seeds)
+    hop = 0
+    while frontier and (hops is None or hop < hops):
+        new_movies = set()
+        for chunk in read_chunks(path, columns, chunk_size, progress):
+            for person_id, movie_id in chunk:
+                if person_id in frontier and movie_id not in movies:
+                    new_movies.add(movie_id)
+        movies |= new_movies
+
+        frontier = set()
+        for chunk in read_chunks(path, columns, chunk_size, progress):
+            for person_id, movie_id in chunk:
+                if movie_id in new_movies and person_id not in people:
+                    frontier.add(person_id)
+        people |= frontier
+        hop += 1
+    return people, movies
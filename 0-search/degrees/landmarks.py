@@ -0,0 +1,197 @@
+"""
+Landmark distance index for instant degree estimates.
+
+For K landmark people the index stores the BFS distance from each
+landmark to every person as one byte (255 = not connected), laid out
+person-major so a person's K distances are one contiguous slice. By the
+triangle inequality, for any landmark L
+
+    |d(L, s) - d(L, t)| <= d(s, t) <= d(L, s) + d(L, t)
+
+so bounds on the degrees between two people cost O(K) byte lookups.
+
+Usage: python landmarks.py [directory] [-k K]
+"""
+import argparse
+import json
+import math
+import mmap
+import os
+import struct
+import time
+from array import array
+
+from graph import csv_signature, load_cached
+
+INDEX_MAGIC = b"DEGLMRK\0"
+INDEX_VERSION = 1
+UNREACHABLE = 255
+
+
+class LandmarkIndex():
+
+    def __init__(self, graph, landmarks, distances):
+        self.graph = graph
+        self.landmarks = landmarks
+        self.distances = distances
+        self.k = len(landmarks)
+
+    @classmethod
+    def build(cls, graph, k=16):
+        """
+        Picks the `k` people who starred in the most movies as landmarks
+        and runs a breadth-first search from each of them.
+        """
+        n = len(graph.person_ids)
+        k = min(k, n)
+        offsets = graph.person_offsets
+        landmarks = array("i", sorted(
+            range(n), key=lambda p: offsets[p + 1] - offsets[p],
+            reverse=True)[:k])
+        distances = bytearray([UNREACHABLE]) * (n * k)
+        for i, landmark in enumerate(landmarks):
+            for p, d in bfs_distances(graph, landmark):
+                distances[p * k + i] = min(d, UNREACHABLE - 1)
+        return cls(graph, landmarks, distances)
+
+    def save(self, path, source=None):
+        header = json.dumps({
+            "people": len(self.graph.person_ids),
+            "source": source
+        }).encode("utf-8")
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(INDEX_MAGIC)
+            f.write(struct.pack("<III", INDEX_VERSION, len(header), self.k))
+            f.write(header)
+            f.write(self.landmarks.tobytes())
+            f.write(self.distances)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, graph, source=None):
+        """
+        Memory-maps an index written by `save` for `graph`.
+
+        Raises ValueError if the file is not an index of this version,
+        was built from other data or is truncated.
+        """
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(buffer)
+        if len(buffer) < 20 or bytes(view[:8]) != INDEX_MAGIC:
+            raise ValueError(f"{path} is not a landmark index")
+        version, header_size, k = struct.unpack("<III", view[8:20])
+        if version != INDEX_VERSION:
+            raise ValueError(f"{path} has index version {version}")
+        if 20 + header_size > len(buffer):
+            raise ValueError(f"{path} is truncated or corrupt")
+        header = json.loads(str(view[20:20 + header_size], "utf-8"))
+        if header["people"] != len(graph.person_ids) or (
+            source is not None and header["source"] != source
+        ):
+            raise ValueError(f"{path} is out of date")
+        start = 20 + header_size
+        if start + (4 + header["people"]) * k != len(buffer):
+            raise ValueError(f"{path} is truncated or corrupt")
+        landmarks = array("i")
+        landmarks.frombytes(view[start:start + 4 * k])
+        index = cls(graph, landmarks, view[start + 4 * k:])
+        index.buffer = buffer
+        return index
+
+    def profile(self, person_id):
+        """Returns the landmark distances of a person as bytes."""
+        p = self.graph.person_index(person_id)
+        return bytes(self.distances[p * self.k:(p + 1) * self.k])
+
+    def bounds(self, source_id, target_id):
+        """
+        Returns (lower, upper) bounds on the degrees of separation between
+        two people. `lower` is math.inf if they are certainly not
+        connected; `upper` is math.inf if no landmark reaches them.
+        """
+        return profile_bounds(self.profile(source_id), self.profile(target_id))
+
+
+def profile_bounds(a, b):
+    """
+    Returns (lower, upper) bounds on the distance between two people
+    from their landmark profiles.
+    """
+    lower = 0
+    upper = math.inf
+    for da, db in zip(a, b):
+        if da == UNREACHABLE and db == UNREACHABLE:
+            continue
+        if da == UNREACHABLE or db == UNREACHABLE:
+            return math.inf, math.inf
+        lower = max(lower, abs(da - db))
+        upper = min(upper, da + db)
+    return lower, upper
+
+
+def bfs_distances(graph, source):
+    """
+    Yields (person index, distance) for every person connected to
+    `source` in breadth-first order.
+    """
+    person_offsets = graph.person_offsets
+    person_movies = graph.person_movies
+    movie_offsets = graph.movie_offsets
+    movie_stars = graph.movie_stars
+    seen_people = bytearray(len(graph.person_ids))
+    seen_movies = bytearray(len(graph.movie_ids))
+    seen_people[source] = 1
+    layer = [source]
+    depth = 0
+    while layer:
+        next_layer = []
+        for p in layer:
+            yield p, depth
+            for i in range(person_offsets[p], person_offsets[p + 1]):
+                m = person_movies[i]
+                if seen_movies[m]:
+                    continue
+                seen_movies[m] = 1
+                for j in range(movie_offsets[m], movie_offsets[m + 1]):
+                    star = movie_stars[j]
+                    if not seen_people[star]:
+                        seen_people[star] = 1
+                        next_layer.append(star)
+        layer = next_layer
+        depth += 1
+
+
+def load_index(directory, graph=None):
+    """
+    Loads `landmarks.index` for `directory`, or returns None if it is
+    missing or was built from older CSVs.
+    """
+    if graph is None:
+        graph = load_cached(directory)
+    try:
+        return LandmarkIndex.load(os.path.join(directory, "landmarks.index"),
+                                  graph, csv_signature(directory))
+    except (OSError, ValueError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("-k", type=int, default=16,
+                        help="number of landmarks")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    graph = load_cached(args.directory)
+    index = LandmarkIndex.build(graph, args.k)
+    path = os.path.join(args.directory, "landmarks.index")
+    index.save(path, csv_signature(args.directory))
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {index.k} landmarks to {path} in {elapsed:.1f}s.")
+
+
+if __name__ == "__main__":
+    main()
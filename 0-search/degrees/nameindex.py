@@ -0,0 +1,204 @@
+"""
+Name lookup index for degrees: exact, prefix and fuzzy search.
+
+Names are kept twice as sorted arrays of lowercased names, once as
+written and once reversed, each with the matching person_ids alongside.
+Exact and prefix lookups are a `bisect` into the first array.
+
+Fuzzy search walks a sorted array as a trie: the names starting with a
+given prefix are a contiguous range, and the characters that can follow
+the prefix are read off the names in that range, so any character in the
+names (accents included) is tried and no others. Each prefix carries a
+row of edit distances from the prefixes of the query, and the walk
+leaves a branch once every distance in its row is over the budget. When
+a name is within `k` edits of the query, then for some split of the
+name, either its start is within k // 2 edits of the query's first half
+or its end is within k // 2 edits of the query's second half, so the
+first half is walked over the names and the second half, reversed, over
+the reversed names, and only names reached that way are scored in full.
+"""
+import itertools
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+
+# Halves of a fuzzy query shorter than this plus their edit budget would
+# match nearly every name, so such queries find nothing
+MIN_FUZZY_PREFIX = 2
+
+
+class NameIndex():
+
+    def __init__(self, names, ids, reversed_names, reversed_ids):
+        self.names = names
+        self.ids = ids
+        self.reversed_names = reversed_names
+        self.reversed_ids = reversed_ids
+
+    @classmethod
+    def from_people(cls, people):
+        """Builds the index from a dict of person_id -> {"name": ...}."""
+        lowered = {person_id: person["name"].lower()
+                   for person_id, person in people.items()}
+        ids = sorted(lowered, key=lowered.__getitem__)
+        reversed_lowered = {person_id: name[::-1]
+                            for person_id, name in lowered.items()}
+        reversed_ids = sorted(reversed_lowered,
+                              key=reversed_lowered.__getitem__)
+        return cls([lowered[person_id] for person_id in ids], ids,
+                   [reversed_lowered[person_id] for person_id in reversed_ids],
+                   reversed_ids)
+
+    @classmethod
+    def from_graph(cls, graph):
+        """Builds the index as views over a `CompactGraph`'s name orders."""
+        return cls(
+            LowerNames(graph, graph.name_order),
+            IdsInOrder(graph, graph.name_order),
+            LowerNames(graph, graph.reversed_name_order, reverse=True),
+            IdsInOrder(graph, graph.reversed_name_order)
+        )
+
+    def exact(self, name):
+        """Returns the person_ids whose name is `name`, ignoring case."""
+        return [person_id for _, person_id in
+                prefix_range(self.names, self.ids, name.lower(), exact=True)]
+
+    def prefix(self, prefix, limit=None):
+        """
+        Returns the person_ids whose name starts with `prefix`, ignoring
+        case, in name order.
+        """
+        matches = prefix_range(self.names, self.ids, prefix.lower())
+        return [person_id for _, person_id in
+                itertools.islice(matches, limit)]
+
+    def fuzzy(self, name, max_distance=2, limit=10):
+        """
+        Returns up to `limit` (distance, person_id) pairs for the people
+        whose name is within `max_distance` edits of `name`, ignoring
+        case, closest first. Returns [] for names too short to search
+        that way (under MIN_FUZZY_PREFIX + max_distance // 2 characters in
+        either half).
+        """
+        query = name.lower()
+        half = len(query) // 2
+        budget = max_distance // 2
+        if half - budget < MIN_FUZZY_PREFIX:
+            return []
+        candidates = {}
+        searches = (
+            (self.names, self.ids, query[:half], False),
+            (self.reversed_names, self.reversed_ids, query[half:][::-1], True)
+        )
+        for names, ids, part, reverse in searches:
+            for found, person_id in fuzzy_prefix_range(names, ids, part,
+                                                       budget):
+                if reverse:
+                    found = found[::-1]
+                candidates[person_id] = found
+
+        ranked = []
+        for person_id, found in candidates.items():
+            distance = edit_distance(query, found, max_distance)
+            if distance <= max_distance:
+                ranked.append((distance, found, person_id))
+        ranked.sort()
+        return [(distance, person_id)
+                for distance, _, person_id in ranked[:limit]]
+
+
+def prefix_range(names, ids, prefix, exact=False):
+    """
+    Yields (name, person_id) for every name in the sorted `names` that
+    starts with (or, with `exact`, equals) `prefix`.
+    """
+    i = bisect_left(names, prefix)
+    while i < len(names):
+        name = names[i]
+        if not name.startswith(prefix) or (exact and name != prefix):
+            return
+        yield name, ids[i]
+        i += 1
+
+
+def fuzzy_prefix_range(names, ids, part, budget):
+    """
+    Yields (name, person_id) for every name in the sorted `names` that
+    starts with some string within `budget` edits of `part`.
+    """
+    # Each entry is a prefix, its edit distances from each prefix of
+    # `part`, and the range of names that start with it
+    stack = [("", list(range(len(part) + 1)), 0, len(names))]
+    while stack:
+        prefix, row, lo, hi = stack.pop()
+        if row[-1] <= budget:
+            for i in range(lo, hi):
+                yield names[i], ids[i]
+            continue
+        depth = len(prefix)
+        # Names equal to the prefix come first and have no next character
+        i = bisect_right(names, prefix, lo, hi)
+        while i < hi:
+            c = names[i][depth]
+            child = prefix + c
+            if c == "\U0010ffff":
+                j = hi
+            else:
+                j = bisect_left(names, prefix + chr(ord(c) + 1), i, hi)
+            child_row = [row[0] + 1]
+            for k in range(1, len(part) + 1):
+                child_row.append(min(row[k] + 1, child_row[k - 1] + 1,
+                                     row[k - 1] + (part[k - 1] != c)))
+            if min(child_row) <= budget:
+                stack.append((child, child_row, i, j))
+            i = j
+
+
+def edit_distance(a, b, max_distance):
+    """
+    Returns the Levenshtein distance between `a` and `b`, or
+    max_distance + 1 as soon as it is known to exceed `max_distance`.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1,
+                               current[j - 1] + 1,
+                               previous[j - 1] + (ca != cb)))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+class LowerNames(Sequence):
+    """Lowercased (optionally reversed) person names in a given order."""
+
+    def __init__(self, graph, order, reverse=False):
+        self.names = graph.person_names
+        self.order = order
+        self.reverse = reverse
+
+    def __len__(self):
+        return len(self.order)
+
+    def __getitem__(self, i):
+        name = self.names[self.order[i]].lower()
+        return name[::-1] if self.reverse else name
+
+
+class IdsInOrder(Sequence):
+    """Person IDs in a given order."""
+
+    def __init__(self, graph, order):
+        self.ids = graph.person_ids
+        self.order = order
+
+    def __len__(self):
+        return len(self.order)
+
+    def __getitem__(self, i):
+        return self.ids[self.order[i]]
@@ -0,0 +1,94 @@
+"""
+Runs many degrees queries in parallel.
+
+The graph is loaded once into the memory-mapped snapshot written by
+`graph.load_cached`, or into a temporary one if the data directory can't
+hold it; every worker process maps the same file, so the arrays are
+shared through the page cache rather than copied per worker.
+
+Usage: python parallel.py directory --pairs FILE [--processes N]
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+
+from graph import CompactGraph, csv_signature, load_cached
+
+# The graph mapped by each worker process
+graph = None
+
+
+def init_worker(path, source):
+    global graph
+    graph = CompactGraph.load(path, source)
+
+
+def answer(pair):
+    """
+    Returns the path between a (source, target) pair of person IDs as
+    (movie_id, person_id) pairs, or None if either is unknown or they
+    are not connected.
+    """
+    try:
+        source = graph.person_index(pair[0])
+        target = graph.person_index(pair[1])
+    except KeyError:
+        return None
+    path = graph.shortest_path(source, target)
+    if path is None:
+        return None
+    return [(graph.movie_ids[m], graph.person_ids[p]) for m, p in path]
+
+
+def run_queries(directory, pairs, processes=None, chunksize=16):
+    """
+    Answers (source, target) person ID pairs across a process pool and
+    yields their paths in input order.
+    """
+    path = os.path.join(directory, "degrees.snapshot")
+    source = csv_signature(directory)
+    graph = load_cached(directory, path)
+    with tempfile.TemporaryDirectory() as tmp:
+        # load_cached carries on without a snapshot it can't write, but
+        # the workers need one that matches the CSVs
+        try:
+            CompactGraph.load(path, source)
+        except (OSError, ValueError):
+            path = os.path.join(tmp, "degrees.snapshot")
+            graph.save(path, source)
+        del graph
+        with multiprocessing.Pool(processes, init_worker,
+                                  (path, source)) as pool:
+            yield from pool.imap(answer, pairs, chunksize)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--pairs", metavar="FILE", required=True,
+                        help="a CSV file of source,target person IDs")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="worker processes (default: one per core)")
+    args = parser.parse_args()
+
+    with open(args.pairs, encoding="utf-8", newline="") as f:
+        pairs = [(row[0].strip(), row[1].strip())
+                 for row in csv.reader(f) if row]
+
+    print("Loading data...", file=sys.stderr)
+    results = run_queries(args.directory, pairs, args.processes)
+    for (source, target), path in zip(pairs, results):
+        print(json.dumps({
+            "source": source,
+            "target": target,
+            "degrees": None if path is None else len(path),
+            "path": path
+        }), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,9 @@
+import heapq
+import itertools
+import time
+from collections import Counter, deque
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -36,3 +42,145 @@ class QueueFrontier(StackFrontier):
             node = self.frontier[0]
             self.frontier = self.frontier[1:]
             return node
+
+
+class DequeStackFrontier():
+    """
+    StackFrontier with O(1) add/remove and O(1) contains_state.
+    States must be hashable.
+    """
+
+    def __init__(self):
+        self.frontier = deque()
+        self.states = Counter()
+
+    def add(self, node):
+        self.frontier.append(node)
+        self.states[node.state] += 1
+
+    def contains_state(self, state):
+        return self.states[state] > 0
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.pop()
+            self.discard_state(node.state)
+            return node
+
+    def discard_state(self, state):
+        self.states[state] -= 1
+        if not self.states[state]:
+            del self.states[state]
+
+    def pop(self):
+        return self.frontier.pop()
+
+
+class DequeQueueFrontier(DequeStackFrontier):
+
+    def pop(self):
+        return self.frontier.popleft()
+
+
+class PriorityFrontier(DequeStackFrontier):
+    """
+    Frontier for uniform-cost and A* search: `remove` returns the node with
+    the lowest `priority(node)`, oldest first among ties.
+    States must be hashable.
+    """
+
+    def __init__(self, priority):
+        self.priority = priority
+        self.frontier = []
+        self.states = Counter()
+        self.counter = itertools.count()
+
+    def add(self, node):
+        heapq.heappush(
+            self.frontier, (self.priority(node), next(self.counter), node))
+        self.states[node.state] += 1
+
+    def pop(self):
+        return heapq.heappop(self.frontier)[2]
+
+
+class SearchStats():
+    """
+    Counters a search can fill in: nodes expanded, movies scanned, peak
+    frontier size, depth reached, wall time per layer, and the `hubs`
+    states whose expansions scanned the most neighbors.
+
+    `depth` is the number of breadth-first layers expanded, so it is the
+    same for a one-directional and a bidirectional search between the
+    same people: a one-degree pair takes one layer either way. Each
+    `next_layer` call ends a layer, and `finish` records the time after
+    the last one.
+    """
+
+    def __init__(self, hubs=5):
+        self.nodes_expanded = 0
+        self.movies_scanned = 0
+        self.peak_frontier = 0
+        self.depth = 0
+        self.layer_times = []
+        self.elapsed = 0.0
+        self.max_hubs = hubs
+        self.hubs = []
+
+    def start(self):
+        self.started = self.layer_started = time.perf_counter()
+
+    def next_layer(self):
+        now = time.perf_counter()
+        self.layer_times.append(now - self.layer_started)
+        self.layer_started = now
+        self.depth += 1
+
+    def expanded(self, state, movies, neighbors):
+        self.nodes_expanded += 1
+        self.movies_scanned += movies
+        entry = (neighbors, state)
+        if len(self.hubs) < self.max_hubs:
+            heapq.heappush(self.hubs, entry)
+        elif entry > self.hubs[0]:
+            heapq.heapreplace(self.hubs, entry)
+
+    def frontier_size(self, size):
+        if size > self.peak_frontier:
+            self.peak_frontier = size
+
+    def finish(self):
+        now = time.perf_counter()
+        self.layer_times.append(now - self.layer_started)
+        self.elapsed = now - self.started
+
+    def to_dict(self):
+        return {
+            "nodes_expanded": self.nodes_expanded,
+            "movies_scanned": self.movies_scanned,
+            "peak_frontier": self.peak_frontier,
+            "depth": self.depth,
+            "layer_times": self.layer_times,
+            "elapsed": self.elapsed,
+            "hubs": [{"state": state, "neighbors": neighbors}
+                     for neighbors, state in sorted(self.hubs, reverse=True)]
+        }
+
+    def __str__(self):
+        lines = [
+            f"Nodes expanded: {self.nodes_expanded}",
+            f"Movies scanned: {self.movies_scanned}",
+            f"Peak frontier: {self.peak_frontier}",
+            f"Depth: {self.depth}",
+            f"Time: {self.elapsed * 1000:.2f} ms"
+        ]
+        for i, seconds in enumerate(self.layer_times):
+            lines.append(f"    layer {i}: {seconds * 1000:.2f} ms")
+        for neighbors, state in sorted(self.hubs, reverse=True):
+            lines.append(f"Hub {state}: {neighbors} neighbors scanned")
+        return "\n".join(lines)
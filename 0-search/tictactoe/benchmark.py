@@ -0,0 +1,59 @@
+"""
+Benchmarks for the tictactoe search.
+
+Usage: python benchmark.py [--repeat N] [--rows R] [--cols C] [-k K]
+                           [--time-limit SECONDS] [--no-book]
+"""
+import argparse
+import statistics
+import time
+
+import tictactoe as ttt
+
+
+def first_move(repeat, rows=3, cols=3, k=None, time_limit=None, book=True):
+    """
+    Times minimax on the empty board with a fresh searcher (cold) and
+    right after (warm), with or without the opening book. Returns lists
+    of seconds and the nodes searched by the last cold search.
+    """
+    board = ttt.initial_state(rows, cols)
+    if not book:
+        ttt.books[ttt.game(board, k)] = None
+    cold = []
+    warm = []
+    for _ in range(repeat):
+        ttt.searchers.clear()
+        start = time.perf_counter()
+        ttt.minimax(board, k, time_limit)
+        cold.append(time.perf_counter() - start)
+        nodes = ttt.searcher(board, k).nodes
+
+        start = time.perf_counter()
+        ttt.minimax(board, k, time_limit)
+        warm.append(time.perf_counter() - start)
+    return cold, warm, nodes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--rows", type=int, default=3)
+    parser.add_argument("--cols", type=int, default=3)
+    parser.add_argument("-k", type=int, help="marks in a row to win")
+    parser.add_argument("--time-limit", type=float,
+                        help="seconds per move (default: search to the end)")
+    parser.add_argument("--no-book", action="store_true",
+                        help="search even if there is an opening book")
+    args = parser.parse_args()
+
+    cold, warm, nodes = first_move(args.repeat, args.rows, args.cols, args.k,
+                                   args.time_limit, not args.no_book)
+    searcher = ttt.searcher(ttt.initial_state(args.rows, args.cols), args.k)
+    print(f"First move, cold: {statistics.median(cold) * 1000:.3f} ms "
+          f"({nodes:,} nodes, {len(searcher.table):,} positions stored)")
+    print(f"First move, warm: {statistics.median(warm) * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Bitboard engine for m,n,k-games (tic-tac-toe on any rows x cols board,
+won by k in a row).
+
+A position is a pair of ints (x, o), one bitmask of occupied cells per
+side, with cell (i, j) at bit i * cols + j. Whose turn it is follows
+from the popcounts, and a side has won when one of the precomputed
+win masks is fully contained in its bitmask.
+"""
+
+X_WINS = 1
+O_WINS = -1
+TIE = 0
+
+
+class Game():
+
+    def __init__(self, rows=3, cols=3, k=3):
+        if not 0 < k <= max(rows, cols):
+            raise ValueError(
+                f"Cannot get {k} in a row on a {rows}x{cols} board")
+        self.rows = rows
+        self.cols = cols
+        self.k = k
+        self.cells = rows * cols
+        self.full = (1 << self.cells) - 1
+
+        # Every line of k cells, and the lines through each cell
+        self.win_masks = []
+        self.lines_through = [[] for _ in range(self.cells)]
+        for i in range(rows):
+            for j in range(cols):
+                for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_i = i + di * (k - 1)
+                    end_j = j + dj * (k - 1)
+                    if not (0 <= end_i < rows and 0 <= end_j < cols):
+                        continue
+                    line = [(i + di * s) * cols + j + dj * s for s in range(k)]
+                    mask = sum(1 << cell for cell in line)
+                    self.win_masks.append(mask)
+                    for cell in line:
+                        self.lines_through[cell].append(mask)
+
+        # For each symmetry of the board, lookup tables mapping each byte
+        # of a bitmask to the bits of its image
+        self.symmetries = [
+            [self._byte_table(destination, start)
+             for start in range(0, self.cells, 8)]
+            for destination in self._symmetry_maps()
+        ]
+
+    def _symmetry_maps(self):
+        """
+        Returns, for each symmetry of the board (8 if it is square, else
+        4), a list mapping each cell to the cell it is moved to.
+        """
+        rows, cols = self.rows, self.cols
+        moves = [
+            lambda i, j: (i, j),
+            lambda i, j: (rows - 1 - i, j),
+            lambda i, j: (i, cols - 1 - j),
+            lambda i, j: (rows - 1 - i, cols - 1 - j),
+        ]
+        if rows == cols:
+            moves += [
+                lambda i, j: (j, i),
+                lambda i, j: (cols - 1 - j, i),
+                lambda i, j: (j, rows - 1 - i),
+                lambda i, j: (cols - 1 - j, rows - 1 - i),
+            ]
+        maps = []
+        for move in moves:
+            destination = []
+            for cell in range(self.cells):
+                i, j = move(*divmod(cell, cols))
+                destination.append(i * cols + j)
+            maps.append(destination)
+        return maps
+
+    def _byte_table(self, destination, start):
+        table = []
+        for byte in range(256):
+            image = 0
+            for bit in range(8):
+                if byte >> bit & 1 and start + bit < self.cells:
+                    image |= 1 << destination[start + bit]
+            table.append(image)
+        return table
+
+    def index(self, i, j):
+        """Returns the bit number of cell (i, j)."""
+        if not (0 <= i < self.rows and 0 <= j < self.cols):
+            raise ValueError(f"({i}, {j}) is off the board")
+        return i * self.cols + j
+
+    def x_to_move(self, x, o):
+        """Returns True if X has the next turn."""
+        return x.bit_count() == o.bit_count()
+
+    def moves(self, x, o):
+        """Returns the empty cells in increasing order."""
+        empty = self.full & ~(x | o)
+        moves = []
+        while empty:
+            low = empty & -empty
+            moves.append(low.bit_length() - 1)
+            empty ^= low
+        return moves
+
+    def play(self, x, o, cell):
+        """Returns the position after the side to move takes `cell`."""
+        bit = 1 << cell
+        if (x | o) & bit:
+            raise ValueError(f"Cell {cell} is taken")
+        if self.x_to_move(x, o):
+            return x | bit, o
+        return x, o | bit
+
+    def wins(self, bits, cell):
+        """Returns True if `bits` has a full line through `cell`."""
+        for mask in self.lines_through[cell]:
+            if bits & mask == mask:
+                return True
+        return False
+
+    def has_line(self, bits):
+        for mask in self.win_masks:
+            if bits & mask == mask:
+                return True
+        return False
+
+    def winner(self, x, o):
+        """Returns X_WINS, O_WINS or TIE (also for unfinished games)."""
+        x_win = self.has_line(x)
+        o_win = self.has_line(o)
+        if x_win and o_win:
+            raise ValueError("Invalid board input")
+        elif x_win:
+            return X_WINS
+        elif o_win:
+            return O_WINS
+        return TIE
+
+    def terminal(self, x, o):
+        return (x | o) == self.full or self.winner(x, o) != TIE
+
+    def canonical(self, x, o):
+        """
+        Returns a key for a position that is the same for all positions
+        symmetric to it.
+        """
+        best = None
+        for tables in self.symmetries:
+            key = transform(x, tables) | transform(o, tables) << self.cells
+            if best is None or key < best:
+                best = key
+        return best
+
+
+def transform(bits, tables):
+    """Maps a bitmask through one symmetry's per-byte lookup tables."""
+    image = 0
+    for table in tables:
+        if not bits:
+            break
+        image |= table[bits & 255]
+        bits >>= 8
+    return image
@@ -0,0 +1,156 @@
+"""
+Perfect-play opening book for small tictactoe boards.
+
+Every position reachable from the empty board is solved once and stored
+as one byte at its base-3 index (cell i contributes 3 ** i if X holds
+it, 2 * 3 ** i if O does), so a lookup is two table reads and an index.
+The byte packs the best cell and the value for X under perfect play;
+0 marks an unreachable position.
+
+Usage: python book.py [--rows R] [--cols C] [-k K]
+"""
+import argparse
+import os
+import struct
+import time
+
+from bitboard import Game, TIE, X_WINS, O_WINS
+from search import Searcher
+
+BOOK_MAGIC = b"TTTBOOK\0"
+BOOK_VERSION = 1
+BOOK_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Largest board a book is built for: 3 ** 12 = 531441 bytes
+MAX_CELLS = 12
+
+IN_BOOK = 0x80
+NO_MOVE = 0x0f
+
+
+class Book():
+
+    def __init__(self, game, entries):
+        self.game = game
+        self.entries = entries
+        # Base-3 weight of each bitmask of the board's cells
+        self.ternary = [0] * (1 << game.cells)
+        for bits in range(1, 1 << game.cells):
+            low = bits & -bits
+            self.ternary[bits] = (self.ternary[bits ^ low]
+                                  + 3 ** (low.bit_length() - 1))
+
+    @classmethod
+    def build(cls, game, searcher=None):
+        """Solves every position reachable in `game` from the empty board."""
+        if game.cells > MAX_CELLS:
+            raise ValueError(f"Boards over {MAX_CELLS} cells are too large "
+                             "for an opening book")
+        if searcher is None:
+            searcher = Searcher(game)
+        book = cls(game, bytearray(3 ** game.cells))
+        stack = [(0, 0)]
+        while stack:
+            x, o = stack.pop()
+            i = book.index(x, o)
+            if book.entries[i]:
+                continue
+            if game.terminal(x, o):
+                book.entries[i] = encode_entry(None, game.winner(x, o))
+                continue
+            cell, score, _ = searcher.best_move(x, o)
+            value = TIE
+            if score != 0:
+                won = score > 0
+                value = X_WINS if won == game.x_to_move(x, o) else O_WINS
+            book.entries[i] = encode_entry(cell, value)
+            for move in game.moves(x, o):
+                stack.append(game.play(x, o, move))
+        return book
+
+    def save(self, path):
+        game = self.game
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(BOOK_MAGIC)
+            f.write(struct.pack("<IIII", BOOK_VERSION,
+                                game.rows, game.cols, game.k))
+            f.write(self.entries)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, game):
+        """
+        Reads a book written by `save` for `game`.
+
+        Raises ValueError if the file is not a book of this version or was
+        built for another game.
+        """
+        with open(path, "rb") as f:
+            data = f.read()
+        if data[:8] != BOOK_MAGIC:
+            raise ValueError(f"{path} is not an opening book")
+        version, rows, cols, k = struct.unpack("<IIII", data[8:24])
+        if version != BOOK_VERSION:
+            raise ValueError(f"{path} has book version {version}")
+        if (rows, cols, k) != (game.rows, game.cols, game.k) or (
+            len(data) - 24 != 3 ** game.cells
+        ):
+            raise ValueError(f"{path} is not a book for this game")
+        return cls(game, data[24:])
+
+    def index(self, x, o):
+        return self.ternary[x] + 2 * self.ternary[o]
+
+    def lookup(self, x, o):
+        """
+        Returns (cell, value) for a position: the best cell to take (None
+        if the game is over) and the value for X under perfect play, or
+        None if the position is not in the book.
+        """
+        entry = self.entries[self.index(x, o)]
+        if not entry:
+            return None
+        cell = entry & NO_MOVE
+        return (None if cell == NO_MOVE else cell), (entry >> 4 & 3) - 1
+
+
+def encode_entry(cell, value):
+    return IN_BOOK | (value + 1) << 4 | (NO_MOVE if cell is None else cell)
+
+
+def book_path(game):
+    return os.path.join(BOOK_DIR, f"{game.rows}x{game.cols}k{game.k}.book")
+
+
+def load_book(game):
+    """
+    Loads the book for `game` from BOOK_DIR, or returns None if it is
+    missing or was written for another version.
+    """
+    try:
+        return Book.load(book_path(game), game)
+    except (OSError, ValueError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=3)
+    parser.add_argument("--cols", type=int, default=3)
+    parser.add_argument("-k", type=int, default=3,
+                        help="marks in a row to win")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    game = Game(args.rows, args.cols, args.k)
+    book = Book.build(game)
+    path = book_path(game)
+    book.save(path)
+    elapsed = time.perf_counter() - start
+    positions = sum(1 for entry in book.entries if entry)
+    print(f"Wrote {positions} positions to {path} in {elapsed:.1f}s.")
+
+
+if __name__ == "__main__":
+    main()
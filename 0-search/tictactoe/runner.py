@@ -1,5 +1,6 @@
 import pygame
 import sys
+import threading
 import time
 
 import tictactoe as ttt
@@ -17,14 +18,43 @@ mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
 moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
+# Seconds the computer may think per move, and frames drawn per second
+# meanwhile
+THINK_TIME = 2.0
+FPS = 30
+
+
+class Thinker(threading.Thread):
+    """
+    Searches for the computer's move in the background. `move` is set
+    once the thread has finished; `cancel` makes it finish early.
+    """
+
+    def __init__(self, board):
+        super().__init__(daemon=True)
+        self.board = board
+        self.move = None
+        self.stop = threading.Event()
+
+    def run(self):
+        self.move = ttt.minimax(self.board, time_limit=THINK_TIME,
+                                stop=self.stop)
+
+    def cancel(self):
+        self.stop.set()
+
+
+clock = pygame.time.Clock()
 user = None
 board = ttt.initial_state()
-ai_turn = False
+thinker = None
 
 while True:
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            if thinker is not None:
+                thinker.cancel()
             sys.exit()
 
     screen.fill(black)
@@ -110,13 +140,12 @@ while True:
 
         # Check for AI move
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+            if thinker is None:
+                thinker = Thinker(board)
+                thinker.start()
+            elif not thinker.is_alive():
+                board = ttt.result(board, thinker.move)
+                thinker = None
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
@@ -127,9 +156,12 @@ while True:
                     if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
                         board = ttt.result(board, (i, j))
 
-        if game_over:
+        # Offer a new game once this one is over, or while the computer is
+        # thinking, in which case its search is cancelled
+        if game_over or thinker is not None:
             againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
-            again = mediumFont.render("Play Again", True, black)
+            label = "Play Again" if game_over else "New Game"
+            again = mediumFont.render(label, True, black)
             againRect = again.get_rect()
             againRect.center = againButton.center
             pygame.draw.rect(screen, white, againButton)
@@ -141,6 +173,9 @@ while True:
                     time.sleep(0.2)
                     user = None
                     board = ttt.initial_state()
-                    ai_turn = False
+                    if thinker is not None:
+                        thinker.cancel()
+                        thinker = None
 
     pygame.display.flip()
+    clock.tick(FPS)
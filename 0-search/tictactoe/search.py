@@ -0,0 +1,230 @@
+"""
+Alpha-beta search over bitboard `Game` positions.
+
+`Searcher.best_move` runs a negamax alpha-beta search by iterative
+deepening: depth 1, 2, ... until the game tree is exhausted or the time
+budget runs out, keeping the best move of the last completed depth.
+Moves are ordered by killer moves (the two most recent cutoffs at the
+same ply), then the history heuristic (cutoffs weighted by depth), then
+how many lines go through the cell. Positions are stored in a
+transposition table under their symmetry-canonical key, and positions
+left at the depth horizon are scored by a pluggable heuristic.
+
+Scores are from the point of view of the side to move. A won game is
+worth WIN plus the number of cells left empty, so faster wins score
+higher; heuristic scores must stay strictly between -WIN and WIN.
+"""
+import math
+import time
+
+WIN = 1_000_000
+
+# Transposition table entry kinds: the stored score is exact, or only a
+# lower or upper bound because the search was cut off
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+
+class Timeout(Exception):
+    pass
+
+
+def open_lines(game, me, them):
+    """
+    Default heuristic: each line still open to only one side is worth
+    4 ** (marks it has on it) to that side.
+    """
+    score = 0
+    for mask in game.win_masks:
+        mine = me & mask
+        theirs = them & mask
+        if not theirs:
+            if mine:
+                score += 4 ** mine.bit_count()
+        elif not mine:
+            score -= 4 ** theirs.bit_count()
+    return max(-WIN + 1, min(WIN - 1, score))
+
+
+class Limits():
+    """
+    What one `best_move` call counts and stops on: its own node count,
+    cancel event and deadline, so calls on different threads sharing a
+    searcher do not see each other's.
+    """
+
+    def __init__(self, stop=None):
+        self.nodes = 0
+        self.stop = stop
+        self.deadline = None
+
+    def check(self):
+        if self.stop is not None and self.stop.is_set():
+            raise Timeout
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise Timeout
+
+
+class Searcher():
+
+    def __init__(self, game, heuristic=None, max_entries=1_000_000):
+        self.game = game
+        self.heuristic = open_lines if heuristic is None else heuristic
+        self.max_entries = max_entries
+        self.table = {}
+        self.history = [0] * game.cells
+        self.killers = [[] for _ in range(game.cells)]
+        self.line_counts = [len(lines) for lines in game.lines_through]
+        self.nodes = 0
+
+    def best_move(self, x, o, time_limit=None, max_depth=None, stop=None):
+        """
+        Returns (cell, score, depth) for the side to move: the best move
+        found, its score and the depth searched to. Searches to the end
+        of the game unless `time_limit` (seconds) or `max_depth` stops it
+        first; depth 1 is always completed. Returns None if the game is
+        over.
+
+        Setting `stop` (a threading.Event) from another thread cancels the
+        search, which then returns as if out of time (None if not even
+        depth 1 was completed). Calls may overlap on different threads,
+        each with its own limits; `nodes` is left at the node count of
+        the last call to finish.
+        """
+        game = self.game
+        if game.terminal(x, o):
+            return None
+        if len(self.table) > self.max_entries:
+            self.table.clear()
+        me, them = (x, o) if game.x_to_move(x, o) else (o, x)
+        empties = game.cells - (x | o).bit_count()
+        if max_depth is None or max_depth > empties:
+            max_depth = empties
+
+        limits = Limits(stop)
+        deadline = None
+        if time_limit is not None:
+            deadline = time.perf_counter() + time_limit
+        best = None
+        for depth in range(1, max_depth + 1):
+            previous = None
+            if best is not None:
+                previous = best[0]
+                limits.deadline = deadline
+            try:
+                cell, score = self._root(me, them, depth, previous, limits)
+            except Timeout:
+                break
+            best = cell, score, depth
+            if abs(score) >= WIN:
+                break
+        self.nodes = limits.nodes
+        return best
+
+    def _root(self, me, them, depth, previous, limits):
+        game = self.game
+        empties = game.cells - (me | them).bit_count()
+        moves = self._order(game.full & ~(me | them), 0)
+        if previous is not None:
+            moves.remove(previous)
+            moves.insert(0, previous)
+
+        alpha = -math.inf
+        move = None
+        for cell in moves:
+            mine = me | 1 << cell
+            if game.wins(mine, cell):
+                return cell, WIN + empties - 1
+            score = -self._negamax(them, mine, depth - 1, -math.inf, -alpha,
+                                   1, limits)
+            if score > alpha:
+                alpha = score
+                move = cell
+            limits.check()
+        return move, alpha
+
+    def _negamax(self, me, them, depth, alpha, beta, ply, limits):
+        """
+        Returns the score of the position for `me`, the side to move,
+        searched `depth` plies deep within the (alpha, beta) window.
+        """
+        limits.nodes += 1
+        if limits.nodes & 1023 == 0:
+            limits.check()
+        game = self.game
+        empty = game.full & ~(me | them)
+        if not empty:
+            return 0
+        if depth == 0:
+            return self.heuristic(game, me, them)
+
+        key = game.canonical(me, them)
+        entry = self.table.get(key)
+        if entry is not None:
+            entry_depth, score, kind = entry
+            if entry_depth >= depth:
+                if kind == EXACT:
+                    return score
+                elif kind == LOWER:
+                    alpha = max(alpha, score)
+                else:
+                    beta = min(beta, score)
+                if alpha >= beta:
+                    return score
+
+        original_alpha = alpha
+        empties = empty.bit_count()
+        best = -math.inf
+        for cell in self._order(empty, ply):
+            mine = me | 1 << cell
+            if game.wins(mine, cell):
+                score = WIN + empties - 1
+            else:
+                score = -self._negamax(them, mine, depth - 1,
+                                       -beta, -alpha, ply + 1, limits)
+            if score > best:
+                best = score
+            if best > alpha:
+                alpha = best
+            if alpha >= beta:
+                self._cutoff(cell, depth, ply)
+                break
+
+        if best <= original_alpha:
+            kind = UPPER
+        elif best >= beta:
+            kind = LOWER
+        else:
+            kind = EXACT
+        # A search reaching every leaf holds at any depth
+        self.table[key] = (game.cells if depth >= empties else depth,
+                           best, kind)
+        return best
+
+    def _order(self, empty, ply):
+        """
+        Returns the empty cells, killer moves at `ply` first, then by
+        history score and number of lines through them.
+        """
+        moves = []
+        while empty:
+            low = empty & -empty
+            moves.append(low.bit_length() - 1)
+            empty ^= low
+        history = self.history
+        line_counts = self.line_counts
+        moves.sort(key=lambda cell: (history[cell], line_counts[cell]),
+                   reverse=True)
+        for killer in reversed(self.killers[ply]):
+            if killer in moves:
+                moves.remove(killer)
+                moves.insert(0, killer)
+        return moves
+
+    def _cutoff(self, cell, depth, ply):
+        self.history[cell] += depth * depth
+        killers = self.killers[ply]
+        if cell not in killers:
+            killers.insert(0, cell)
+            del killers[2:]
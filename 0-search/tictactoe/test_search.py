@@ -0,0 +1,73 @@
+"""
+Tests for searches sharing a Searcher across threads.
+
+Usage: python -m unittest test_search
+"""
+import threading
+import time
+import unittest
+
+import tictactoe as ttt
+
+
+class Search(threading.Thread):
+    """Runs one minimax call on its own thread with its own stop event."""
+
+    def __init__(self, board):
+        super().__init__(daemon=True)
+        self.board = board
+        self.stop = threading.Event()
+        self.move = None
+
+    def run(self):
+        self.move = ttt.minimax(self.board, k=4, stop=self.stop)
+
+
+class OverlappingSearchTest(unittest.TestCase):
+
+    def test_cancel_is_per_call(self):
+        # 5x5 boards, four in a row: too big to search out in the test
+        board = ttt.initial_state(5, 5)
+        board[2][2] = ttt.X
+        first = Search(board)
+        first.start()
+        time.sleep(0.2)
+        second = Search(ttt.result(board, (1, 1)))
+        second.start()
+        time.sleep(0.2)
+
+        # Cancelling the first search must not depend on the second
+        first.stop.set()
+        first.join(timeout=5)
+        self.assertFalse(first.is_alive())
+        self.assertTrue(second.is_alive())
+        self.assertIsNotNone(first.move)
+        self.assertIs(ttt.EMPTY, board[first.move[0]][first.move[1]])
+
+        second.stop.set()
+        second.join(timeout=5)
+        self.assertFalse(second.is_alive())
+        self.assertIsNotNone(second.move)
+
+    def test_deadline_is_per_call(self):
+        board = ttt.initial_state(5, 5)
+        found = []
+        timed = threading.Thread(target=lambda: found.append(
+            ttt.minimax(board, k=4, time_limit=0.3)), daemon=True)
+        untimed = Search(ttt.result(board, (0, 0)))
+        timed.start()
+        time.sleep(0.1)
+        untimed.start()
+
+        # The untimed search must not lift the timed one's deadline
+        timed.join(timeout=5)
+        self.assertFalse(timed.is_alive())
+        self.assertIsNotNone(found[0])
+        self.assertTrue(untimed.is_alive())
+        untimed.stop.set()
+        untimed.join(timeout=5)
+        self.assertFalse(untimed.is_alive())
+
+
+if __name__ == "__main__":
+    unittest.main()
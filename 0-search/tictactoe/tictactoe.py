@@ -1,208 +1,164 @@
 """
 Tic Tac Toe Player
 """
-import ipdb
-
 import math
 
+from bitboard import Game, X_WINS, O_WINS
+from book import load_book
+from search import Searcher
+
 X = "X"
 O = "O"
 EMPTY = None
 
 
-def initial_state():
+# Games by board size and win length, their searchers by heuristic and
+# their opening books (None if there is none), created on first use so
+# each keeps its transposition table across moves and games
+games = {}
+searchers = {}
+books = {}
+
+
+def initial_state(rows=3, cols=3):
     """
     Returns starting state of the board.
     """
-    return [[EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY]]
+    return [[EMPTY] * cols for _ in range(rows)]
+
+
+def game(board, k=None):
+    """
+    Returns the bitboard `Game` for a board's size, won by `k` in a row
+    (by default, as many as fit in its shorter side).
+    """
+    rows, cols = len(board), len(board[0])
+    if k is None:
+        k = min(rows, cols)
+    if (rows, cols, k) not in games:
+        games[rows, cols, k] = Game(rows, cols, k)
+    return games[rows, cols, k]
+
+
+def searcher(board, k=None, heuristic=None):
+    """
+    Returns the `Searcher` for a board's game with the given heuristic.
+    """
+    g = game(board, k)
+    if (g, heuristic) not in searchers:
+        searchers[g, heuristic] = Searcher(g, heuristic)
+    return searchers[g, heuristic]
+
+
+def opening_book(board, k=None):
+    """
+    Returns the opening `Book` for a board's game, or None if it has not
+    been built (see book.py).
+    """
+    g = game(board, k)
+    if g not in books:
+        books[g] = load_book(g)
+    return books[g]
+
+
+def encode(board):
+    """
+    Returns the (x, o) bitmasks of a board.
+    """
+    x = o = 0
+    bit = 1
+    for row in board:
+        for cell in row:
+            if cell == X:
+                x |= bit
+            elif cell == O:
+                o |= bit
+            bit <<= 1
+    return x, o
+
+
+def decode(game, x, o):
+    """
+    Returns the board of (x, o) bitmasks.
+    """
+    board = initial_state(game.rows, game.cols)
+    for cell in range(game.cells):
+        if x >> cell & 1:
+            board[cell // game.cols][cell % game.cols] = X
+        elif o >> cell & 1:
+            board[cell // game.cols][cell % game.cols] = O
+    return board
+
 
 def player(board):
     """
     Returns player who has the next turn on a board.
     """
-    count = 0
-    for row in board:
-        for ele in row:
-            if ele=="X":
-                count += 1
-            elif ele=="O":
-                count -=1
-    if count:
-        return "O"
-    else:
-        return "X"
+    return X if game(board).x_to_move(*encode(board)) else O
+
 
 def actions(board):
     """
     Returns set of all possible actions (i, j) available on the board.
     """
-    ret = []
-    for i in range(9):
-        if board[i//3][i%3]==None:
-            ret.append((i//3,i%3))
-    return ret
-    #raise NotImplementedError
+    cols = len(board[0])
+    return [divmod(cell, cols) for cell in game(board).moves(*encode(board))]
 
 
 def result(board, action):
     """
     Returns the board that results from making move (i, j) on the board.
     """
-    ret = initial_state()
-    for i in range(9):
-        if (i//3,i%3)==action:
-            if board[i//3][i%3] is not None:
-                raise Exception("Invalid action")
-            ret[i//3][i%3] = player(board)
-        else:
-            ret[i//3][i%3] = board[i//3][i%3]
-    return ret
-    #raise NotImplementedError
-
-def line(x):
-    if x[0] in ("X","O"):
-        for ele in x:
-            if ele!=x[0]:
-                return None
-        return x[0]
-    else:
-        return None
+    g = game(board)
+    try:
+        x, o = g.play(*encode(board), g.index(*action))
+    except ValueError:
+        raise Exception("Invalid action")
+    return decode(g, x, o)
+
 
-def winner(board):
+def winner(board, k=None):
     """
     Returns the winner of the game, if there is one.
     """
-    x_win = False
-    o_win = False
-    #rows
-    for row in board:
-        tmp = line(row)
-        if tmp=="X":
-            x_win = True
-        elif tmp=="O":
-            o_win = True
-    for col in range(3):
-        tmp = line([board[0][col],board[1][col],board[2][col]])
-        if tmp=="X":
-            x_win = True
-        elif tmp=="O":
-            o_win = True
-    tmp = line([board[0][0],board[1][1],board[2][2]])
-    if tmp=="X":
-        x_win = True
-    elif tmp=="O":
-        o_win = True
-    tmp = line([board[0][2],board[1][1],board[2][0]])
-    if tmp=="X":
-        x_win = True
-    elif tmp=="O":
-        o_win = True
-    if x_win and o_win:
-        raise ValueError("Invalid board input")
-    elif x_win:
-        return "X"
-    elif o_win:
-        return "O"
+    tmp = game(board, k).winner(*encode(board))
+    if tmp == X_WINS:
+        return X
+    elif tmp == O_WINS:
+        return O
     else:
         return None
-    #raise NotImplementedError
 
 
-def terminal(board):
+def terminal(board, k=None):
     """
     Returns True if game is over, False otherwise.
     """
-    if winner(board) is not None:
-        return True
-    elif len(actions(board))==0:
-        return True
-    else:
-        return False
-    #raise NotImplementedError
+    return game(board, k).terminal(*encode(board))
 
 
-def utility(board):
+def utility(board, k=None):
     """
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
     """
-    tmp = winner(board)
-    if tmp=="X":
-        return 1
-    elif tmp=="O":
-        return -1
-    else:
-        return 0
-    #raise NotImplementedError
-
-def get_min(board,side = 1):
-    """
-    side=1 presents player is 'X' while side=-1 presents player is 'O'
-    """
-    if terminal(board):
-        return side*utility(board)
-    acts = actions(board)
-    ret = 2
-    for act in acts:
-        gm = get_max(result(board,act),side)
-        if gm<ret:
-            ret = gm
-        if ret==-1:
-            return ret
-    return ret
-            
-
-def get_max(board,side = 1):
-    """
-    side=1 presents player is 'X' while side=-1 presents player is 'O'
-    """
-    if terminal(board):
-        return side*utility(board)
-    acts = actions(board)
-    ret = -2
-    for act in acts:
-        gm = get_min(result(board,act),side)
-        if gm>ret:
-            ret = gm
-        if ret == 1:
-            return ret
-    return ret
-
-def get_optimal_score(board,side):
-    if terminal(board):
-        return utility(board)
-    acts = actions(board)
-    ret = -2
-    for act in acts:
-        gm = side*get_optimal_score(result(board,act),-side)
-        if gm>ret:
-            ret = gm
-        if ret==1:
-            return side*ret
-    return side*ret
-
-def minimax(board):
+    return game(board, k).winner(*encode(board))
+
+
+def minimax(board, k=None, time_limit=None, heuristic=None, stop=None):
     """
     Returns the optimal action for the current player on the board.
-    """
-    side = 1
-    if player(board)=="O":
-        side = -1
-    #print(side)
-    acts = actions(board)
-    max_min_score = -2
-    ret_act = None
-    #print(f"Player{player(board)} choices:")
-    for act in acts:
-        gm = side*get_optimal_score(result(board,act),side=-side)
-        if gm>max_min_score:
-            max_min_score = gm
-            ret_act = act
-        if max_min_score==1:
-            print("Absolute winning strategy")
-            return ret_act
-    return ret_act
-    #raise NotImplementedError
-
-minimax([["O","X","O"],[None,"X",None],["X",None,None]])
\ No newline at end of file
+
+    With a `time_limit` in seconds, returns the best action found by then,
+    judging unfinished games with `heuristic(game, me, them)` (see
+    search.open_lines). Setting the threading.Event `stop` ends the search
+    early the same way. Positions in the opening book are answered from it.
+    """
+    x, o = encode(board)
+    book = opening_book(board, k)
+    found = book.lookup(x, o) if book is not None else None
+    if found is None:
+        found = searcher(board, k, heuristic).best_move(
+            x, o, time_limit=time_limit, stop=stop)
+    if found is None or found[0] is None:
+        return None
+    return divmod(found[0], len(board[0]))
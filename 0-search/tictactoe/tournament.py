@@ -0,0 +1,237 @@
+"""
+Headless self-play tournament for the tictactoe engine.
+
+Plays engine-vs-engine or engine-vs-random games across a process pool
+and reports outcomes, per-move search latency percentiles and node
+counts. Engine-vs-engine games start from a few random moves so they
+don't all repeat the same line; engine-vs-random games alternate which
+side the engine plays. Each worker keeps its searcher (and transposition
+table) across games, as the runner does across moves.
+
+Usage: python tournament.py [--games N] [--opponent engine|random]
+                            [--rows R] [--cols C] [-k K] [--time-limit S]
+                            [--openings PLIES] [--no-book]
+                            [--processes N] [--seed S] [--report FILE]
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import random
+import statistics
+import sys
+import time
+
+from bitboard import Game, X_WINS, O_WINS
+from book import load_book
+from search import Searcher
+
+# The game, searcher and opening book of each worker process
+game = None
+searcher = None
+book = None
+
+
+def init_worker(rows, cols, k, use_book):
+    global game, searcher, book
+    game = Game(rows, cols, k)
+    searcher = Searcher(game)
+    book = load_book(game) if use_book else None
+
+
+def engine_move(x, o, time_limit):
+    """
+    Returns (cell, nodes, depth) for the engine's move: depth is None
+    for a book move.
+    """
+    if book is not None:
+        found = book.lookup(x, o)
+        if found is not None:
+            return found[0], 0, None
+    cell, _, depth = searcher.best_move(x, o, time_limit=time_limit)
+    return cell, searcher.nodes, depth
+
+
+def play_game(task):
+    """
+    Plays one game and returns its record: the outcome, which side the
+    engine played against a random opponent, and one (ply, side,
+    seconds, nodes, depth) row per engine move.
+    """
+    number, seed, opponent, time_limit, openings = task
+    rng = random.Random(seed)
+    # Against a random opponent the engine plays X in even games
+    engine_side = "X" if number % 2 == 0 else "O"
+    x = o = 0
+    moves = []
+    ply = 0
+    while not game.terminal(x, o):
+        side = "X" if game.x_to_move(x, o) else "O"
+        if ply < openings or (opponent == "random" and side != engine_side):
+            cell = rng.choice(game.moves(x, o))
+        else:
+            start = time.perf_counter()
+            cell, nodes, depth = engine_move(x, o, time_limit)
+            moves.append((ply, side, time.perf_counter() - start,
+                          nodes, depth))
+        x, o = game.play(x, o, cell)
+        ply += 1
+    winner = game.winner(x, o)
+    return {
+        "game": number,
+        "seed": seed,
+        "winner": {X_WINS: "X", O_WINS: "O"}.get(winner),
+        "engine": engine_side if opponent == "random" else None,
+        "plies": ply,
+        "moves": moves
+    }
+
+
+def run_tournament(games, opponent="random", rows=3, cols=3, k=3,
+                   time_limit=None, openings=None, use_book=True,
+                   processes=None, seed=0, chunksize=8):
+    """
+    Plays `games` games across a process pool and yields their records
+    in order.
+    """
+    if openings is None:
+        openings = 2 if opponent == "engine" else 0
+    rng = random.Random(seed)
+    tasks = [(number, rng.getrandbits(32), opponent, time_limit, openings)
+             for number in range(games)]
+    with multiprocessing.Pool(processes, init_worker,
+                              (rows, cols, k, use_book)) as pool:
+        yield from pool.imap(play_game, tasks, chunksize)
+
+
+def percentile(values, q):
+    """Returns the `q`th percentile of sorted `values` (nearest rank)."""
+    if not values:
+        return None
+    rank = round(q / 100 * len(values))
+    return values[min(len(values) - 1, max(0, rank - 1))]
+
+
+def summarize(records, elapsed):
+    """Returns a dict of outcome counts and move statistics."""
+    outcomes = {"X": 0, "O": 0, "tie": 0}
+    engine = {"won": 0, "lost": 0, "tied": 0}
+    latencies = []
+    nodes = []
+    book_moves = 0
+    for record in records:
+        outcomes[record["winner"] or "tie"] += 1
+        if record["engine"] is not None:
+            if record["winner"] is None:
+                engine["tied"] += 1
+            elif record["winner"] == record["engine"]:
+                engine["won"] += 1
+            else:
+                engine["lost"] += 1
+        for _, _, seconds, searched, depth in record["moves"]:
+            latencies.append(seconds * 1000)
+            nodes.append(searched)
+            if depth is None:
+                book_moves += 1
+    latencies.sort()
+    nodes.sort()
+    summary = {
+        "games": len(records),
+        "seconds": elapsed,
+        "games_per_second": len(records) / max(elapsed, 1e-9),
+        "outcomes": outcomes,
+        "engine_moves": len(latencies),
+        "book_moves": book_moves,
+        "latency_ms": {
+            "p50": percentile(latencies, 50),
+            "p90": percentile(latencies, 90),
+            "p99": percentile(latencies, 99),
+            "max": latencies[-1] if latencies else None
+        },
+        "nodes": {
+            "mean": statistics.fmean(nodes) if nodes else None,
+            "p50": percentile(nodes, 50),
+            "p99": percentile(nodes, 99),
+            "max": nodes[-1] if nodes else None
+        }
+    }
+    if any(record["engine"] is not None for record in records):
+        summary["engine_vs_random"] = engine
+    return summary
+
+
+def write_report(path, summary, records):
+    """
+    Writes the summary and every game to `path`: as JSON, or as CSV with
+    one row per engine move if `path` ends in .csv.
+    """
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if not path.endswith(".csv"):
+            json.dump({"summary": summary, "games": records}, f, indent=1)
+            return
+        writer = csv.writer(f)
+        writer.writerow(["game", "winner", "ply", "side", "ms", "nodes",
+                         "depth"])
+        for record in records:
+            for ply, side, seconds, nodes, depth in record["moves"]:
+                writer.writerow([record["game"], record["winner"] or "tie",
+                                 ply, side, f"{seconds * 1000:.3f}", nodes,
+                                 "book" if depth is None else depth])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--opponent", choices=("engine", "random"),
+                        default="random")
+    parser.add_argument("--rows", type=int, default=3)
+    parser.add_argument("--cols", type=int, default=3)
+    parser.add_argument("-k", type=int,
+                        help="marks in a row to win (default: the shorter "
+                             "side)")
+    parser.add_argument("--time-limit", type=float,
+                        help="seconds per move (default: search to the end)")
+    parser.add_argument("--openings", type=int, default=None,
+                        help="random plies at the start of each game "
+                             "(default: 2 against the engine, else 0)")
+    parser.add_argument("--no-book", action="store_true",
+                        help="search even if there is an opening book")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="worker processes (default: one per core)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--report", metavar="FILE",
+                        help="write a .json or .csv report")
+    args = parser.parse_args()
+
+    k = min(args.rows, args.cols) if args.k is None else args.k
+    start = time.perf_counter()
+    records = list(run_tournament(
+        args.games, args.opponent, args.rows, args.cols, k,
+        args.time_limit, args.openings, not args.no_book, args.processes,
+        args.seed
+    ))
+    summary = summarize(records, time.perf_counter() - start)
+
+    outcomes = summary["outcomes"]
+    print(f"{summary['games']} games in {summary['seconds']:.1f}s "
+          f"({summary['games_per_second']:.1f} games/s): X won "
+          f"{outcomes['X']}, O won {outcomes['O']}, {outcomes['tie']} ties")
+    if "engine_vs_random" in summary:
+        engine = summary["engine_vs_random"]
+        print(f"Engine against random: won {engine['won']}, "
+              f"lost {engine['lost']}, tied {engine['tied']}")
+    latency = summary["latency_ms"]
+    if summary["engine_moves"]:
+        print(f"{summary['engine_moves']} engine moves "
+              f"({summary['book_moves']} from the book): latency "
+              f"p50 {latency['p50']:.3f} ms, p90 {latency['p90']:.3f} ms, "
+              f"p99 {latency['p99']:.3f} ms, max {latency['max']:.3f} ms; "
+              f"nodes mean {summary['nodes']['mean']:.0f}, "
+              f"p99 {summary['nodes']['p99']}, max {summary['nodes']['max']}")
+    if args.report:
+        write_report(args.report, summary, records)
+        print(f"Wrote {args.report}.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
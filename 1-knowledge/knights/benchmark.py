@@ -0,0 +1,194 @@
+"""
+Benchmarks for the knights inference engines.
+
+Usage: python benchmark.py entail [--symbols N] [--ratio R] [--queries Q]
+                                  [--seed S] [--truth-table] [--parallel N]
+                                  [--enumerate]
+       python benchmark.py ask [--symbols N] [--ratio R] [--queries Q]
+                               [--seed S]
+       python benchmark.py build [--people N] [--statements M] [--seed S]
+"""
+import argparse
+import random
+import statistics
+import time
+import tracemalloc
+
+import truthtable
+from logic import (And, Biconditional, KnowledgeBase, Not, Or, Symbol,
+                   model_check, model_check_enumerate)
+
+
+def random_knowledge(symbols, clauses, rng, width=3):
+    """
+    Returns an And of `clauses` random Ors of `width` possibly negated
+    symbols.
+    """
+    return And(*[
+        Or(*[symbol if rng.random() < 0.5 else Not(symbol)
+             for symbol in rng.sample(symbols, width)])
+        for _ in range(clauses)
+    ])
+
+
+def time_queries(check, knowledge, queries):
+    """Returns (seconds per query, answers) for `check` on each query."""
+    times = []
+    answers = []
+    for query in queries:
+        start = time.perf_counter()
+        answers.append(check(knowledge, query))
+        times.append(time.perf_counter() - start)
+    return times, answers
+
+
+def bench_entail(args):
+    rng = random.Random(args.seed)
+    symbols = [Symbol(f"P{i}") for i in range(args.symbols)]
+    knowledge = random_knowledge(symbols, round(args.ratio * args.symbols),
+                                 rng)
+    queries = [symbol if rng.random() < 0.5 else Not(symbol)
+               for symbol in rng.sample(symbols,
+                                        min(args.queries, args.symbols))]
+
+    engines = [("cdcl", model_check)]
+    if args.truth_table:
+        engines.append(("table", truthtable.entails))
+    if args.parallel:
+        engines.append(("parallel", lambda knowledge, query:
+                        truthtable.entails_parallel(
+                            knowledge, query, processes=args.parallel)))
+    if args.enumerate:
+        engines.append(("enumerate", model_check_enumerate))
+    print(f"{len(knowledge.conjuncts)} clauses over {args.symbols} symbols, "
+          f"{len(queries)} queries")
+    results = {}
+    for name, check in engines:
+        times, answers = time_queries(check, knowledge, queries)
+        results[name] = answers
+        print(f"{name:<10} median {statistics.median(times) * 1000:10.2f} ms"
+              f"  max {max(times) * 1000:10.2f} ms"
+              f"  entailed {sum(answers)}/{len(answers)}")
+    if len(results) > 1 and len(set(map(tuple, results.values()))) > 1:
+        print("Engines disagree!")
+
+
+def bench_ask(args):
+    rng = random.Random(args.seed)
+    symbols = [Symbol(f"P{i}") for i in range(args.symbols)]
+    knowledge = random_knowledge(symbols, round(args.ratio * args.symbols),
+                                 rng)
+    queries = [symbol if rng.random() < 0.5 else Not(symbol)
+               for symbol in rng.sample(symbols,
+                                        min(args.queries, args.symbols))]
+    print(f"{len(knowledge.conjuncts)} clauses over {args.symbols} symbols, "
+          f"{len(queries)} queries")
+
+    fresh, expected = time_queries(model_check, knowledge, queries)
+    start = time.perf_counter()
+    kb = KnowledgeBase(*knowledge.conjuncts)
+    told = time.perf_counter() - start
+    times, answers = time_queries(lambda kb, query: kb.ask(query), kb,
+                                  queries)
+    print(f"model_check    median {statistics.median(fresh) * 1000:10.2f} ms"
+          f"  total {sum(fresh) * 1000:10.2f} ms")
+    print(f"KnowledgeBase  tell {told * 1000:.2f} ms, first ask "
+          f"{times[0] * 1000:.2f} ms, later asks median "
+          f"{statistics.median(times[1:] or times) * 1000:.2f} ms, total "
+          f"{(told + sum(times)) * 1000:.2f} ms")
+    if answers != expected:
+        print("Engines disagree!")
+
+
+def knights_knowledge(people, statements, rng):
+    """
+    Returns a knights-and-knaves knowledge base: everyone is exactly one
+    of knight or knave, and each statement is a biconditional between its
+    speaker being a knight and a random claim about two other people's
+    kinds, rebuilt from scratch every time it appears.
+    """
+    def kind(i, knight):
+        return Symbol(f"{i} is a {'Knight' if knight else 'Knave'}")
+
+    def exactly_one(i):
+        return Or(And(kind(i, False), Not(kind(i, True))),
+                  And(kind(i, True), Not(kind(i, False))))
+
+    knowledge = [exactly_one(i) for i in range(people)]
+    for _ in range(statements):
+        speaker, a, b = rng.sample(range(people), 3)
+        claim = Or(And(kind(a, True), exactly_one(a)),
+                   And(kind(b, rng.random() < 0.5), exactly_one(b)))
+        knowledge.append(Biconditional(kind(speaker, True), claim))
+    return And(*knowledge)
+
+
+def bench_build(args):
+    tracemalloc.start()
+    knowledge = knights_knowledge(args.people, args.statements,
+                                  random.Random(args.seed))
+    retained = tracemalloc.get_traced_memory()[0] / 2**20
+    tracemalloc.stop()
+    del knowledge
+
+    start = time.perf_counter()
+    knowledge = knights_knowledge(args.people, args.statements,
+                                  random.Random(args.seed))
+    built = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(100):
+        knowledge.symbols()
+    symbols = (time.perf_counter() - start) / 100
+    start = time.perf_counter()
+    for _ in range(100):
+        hash(knowledge)
+    hashed = (time.perf_counter() - start) / 100
+    print(f"{len(knowledge.conjuncts)} sentences over "
+          f"{len(knowledge.symbols())} symbols: built in {built * 1000:.1f} "
+          f"ms, {retained:.2f} MB retained; symbols() {symbols * 1000:.3f} "
+          f"ms, hash() {hashed * 1e6:.2f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    entail = commands.add_parser(
+        "entail", help="time model_check on a random 3-CNF knowledge base")
+    entail.add_argument("--symbols", type=int, default=16)
+    entail.add_argument("--ratio", type=float, default=4.0,
+                        help="clauses per symbol")
+    entail.add_argument("--queries", type=int, default=10)
+    entail.add_argument("--seed", type=int, default=0)
+    entail.add_argument("--truth-table", action="store_true",
+                        help="also time the bit-parallel truth table")
+    entail.add_argument("--parallel", type=int, metavar="PROCESSES",
+                        help="also time the truth table split across a "
+                             "process pool")
+    entail.add_argument("--enumerate", action="store_true",
+                        help="also time the truth-table enumeration")
+    entail.set_defaults(func=bench_entail)
+
+    ask = commands.add_parser(
+        "ask", help="time repeated queries against one KnowledgeBase")
+    ask.add_argument("--symbols", type=int, default=100)
+    ask.add_argument("--ratio", type=float, default=4.0,
+                     help="clauses per symbol")
+    ask.add_argument("--queries", type=int, default=20)
+    ask.add_argument("--seed", type=int, default=0)
+    ask.set_defaults(func=bench_ask)
+
+    build = commands.add_parser(
+        "build", help="time building a knowledge base with repeated parts")
+    build.add_argument("--people", type=int, default=100)
+    build.add_argument("--statements", type=int, default=10000)
+    build.add_argument("--seed", type=int, default=0)
+    build.set_defaults(func=bench_build)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
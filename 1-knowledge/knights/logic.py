@@ -1,7 +1,47 @@
 import itertools
+import weakref
 
 
 class Sentence():
+    """
+    Sentences are immutable and hash-consed: constructing a sentence equal
+    to one that already exists returns the existing object, so equal
+    subtrees are shared, equality is identity, and the hash, symbols and
+    formula of each node are computed once.
+    """
+
+    __slots__ = ("_hash", "_symbols", "_formula", "__weakref__")
+
+    # Every live sentence by (class, parts)
+    _interned = weakref.WeakValueDictionary()
+
+    @classmethod
+    def _make(cls, parts, **fields):
+        """Returns the `cls` sentence made of `parts`, creating it once."""
+        key = (cls, parts)
+        sentence = Sentence._interned.get(key)
+        if sentence is None:
+            sentence = object.__new__(cls)
+            for name, value in fields.items():
+                object.__setattr__(sentence, name, value)
+            object.__setattr__(sentence, "_hash", hash((cls.__name__, parts)))
+            object.__setattr__(sentence, "_symbols", None)
+            object.__setattr__(sentence, "_formula", None)
+            Sentence._interned[key] = sentence
+        return sentence
+
+    def __setattr__(self, name, value):
+        raise AttributeError("sentences are immutable")
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        # Rebuild through the constructor so unpickled sentences are interned
+        return type(self), self._args()
+
+    def _args(self):
+        return ()
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
@@ -9,11 +49,22 @@ class Sentence():
 
     def formula(self):
         """Returns string formula representing logical sentence."""
+        if self._formula is None:
+            object.__setattr__(self, "_formula", self._format())
+        return self._formula
+
+    def _format(self):
         return ""
 
     def symbols(self):
         """Returns a set of all symbols in the logical sentence."""
-        return set()
+        return set(self._symbol_set())
+
+    def _symbol_set(self):
+        if self._symbols is None:
+            object.__setattr__(self, "_symbols", frozenset().union(
+                *[part._symbol_set() for part in self._args()]))
+        return self._symbols
 
     @classmethod
     def validate(cls, sentence):
@@ -44,14 +95,13 @@ class Sentence():
 
 class Symbol(Sentence):
 
-    def __init__(self, name):
-        self.name = name
+    __slots__ = ("name",)
 
-    def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
+    def __new__(cls, name):
+        return cls._make(name, name=name)
 
-    def __hash__(self):
-        return hash(("symbol", self.name))
+    def _args(self):
+        return (self.name,)
 
     def __repr__(self):
         return self.name
@@ -62,23 +112,25 @@ class Symbol(Sentence):
         except KeyError:
             raise Exception(f"variable {self.name} not in model")
 
-    def formula(self):
+    def _format(self):
         return self.name
 
-    def symbols(self):
-        return {self.name}
+    def _symbol_set(self):
+        if self._symbols is None:
+            object.__setattr__(self, "_symbols", frozenset((self.name,)))
+        return self._symbols
 
 
 class Not(Sentence):
-    def __init__(self, operand):
-        Sentence.validate(operand)
-        self.operand = operand
 
-    def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+    __slots__ = ("operand",)
 
-    def __hash__(self):
-        return hash(("not", hash(self.operand)))
+    def __new__(cls, operand):
+        Sentence.validate(operand)
+        return cls._make((operand,), operand=operand)
+
+    def _args(self):
+        return (self.operand,)
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -86,26 +138,21 @@ class Not(Sentence):
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
-    def formula(self):
+    def _format(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
-
 
 class And(Sentence):
-    def __init__(self, *conjuncts):
+
+    __slots__ = ("conjuncts",)
+
+    def __new__(cls, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
+        return cls._make(conjuncts, conjuncts=conjuncts)
 
-    def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
-
-    def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+    def _args(self):
+        return self.conjuncts
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -114,35 +161,31 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
+        """Returns this conjunction with `conjunct` added."""
         Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
+        return And(*self.conjuncts, conjunct)
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
-    def formula(self):
+    def _format(self):
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
-
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
+
+    __slots__ = ("disjuncts",)
+
+    def __new__(cls, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
+        return cls._make(disjuncts, disjuncts=disjuncts)
 
-    def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
-
-    def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+    def _args(self):
+        return self.disjuncts
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -151,30 +194,25 @@ class Or(Sentence):
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
-    def formula(self):
+    def _format(self):
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
-
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
+
+    __slots__ = ("antecedent", "consequent")
+
+    def __new__(cls, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
+        return cls._make((antecedent, consequent),
+                         antecedent=antecedent, consequent=consequent)
 
-    def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
-
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+    def _args(self):
+        return (self.antecedent, self.consequent)
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -183,29 +221,23 @@ class Implication(Sentence):
         return ((not self.antecedent.evaluate(model))
                 or self.consequent.evaluate(model))
 
-    def formula(self):
+    def _format(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
-
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
+
+    __slots__ = ("left", "right")
+
+    def __new__(cls, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
-        self.left = left
-        self.right = right
-
-    def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
+        return cls._make((left, right), left=left, right=right)
 
-    def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+    def _args(self):
+        return (self.left, self.right)
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
@@ -216,17 +248,70 @@ class Biconditional(Sentence):
                 or (not self.left.evaluate(model)
                     and not self.right.evaluate(model)))
 
-    def formula(self):
+    def _format(self):
         left = Sentence.parenthesize(str(self.left))
         right = Sentence.parenthesize(str(self.right))
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
+
+class KnowledgeBase():
+    """
+    Sentences told one at a time, kept compiled to CNF in one incremental
+    SAT solver, so queries reuse its clauses, level-0 simplifications and
+    learned clauses instead of starting from scratch.
+    """
+
+    def __init__(self, *sentences):
+        from sat import CNF, Solver
+        self.cnf = CNF()
+        self.solver = Solver()
+        self.sentences = []
+        for sentence in sentences:
+            self.tell(sentence)
+
+    def tell(self, sentence):
+        """Adds a sentence to the knowledge base."""
+        Sentence.validate(sentence)
+        self.sentences.append(sentence)
+        self.cnf.add(sentence)
+        self._flush()
+
+    def ask(self, query):
+        """
+        Checks if the knowledge base entails query, by solving with query
+        assumed false.
+        """
+        Sentence.validate(query)
+        # Tseitin definitions only name subsentences, so they can stay
+        lit = self.cnf.literal(query)
+        self._flush()
+        return not self.solver.solve([-lit])
+
+    def consistent(self):
+        """Checks if the knowledge base has a model."""
+        return self.solver.solve()
+
+    def _flush(self):
+        """Moves newly compiled clauses into the solver."""
+        for clause in self.cnf.clauses:
+            self.solver.add_clause(clause)
+        self.cnf.clauses.clear()
 
 
 def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+    """
+    Checks if knowledge base entails query, by compiling knowledge ∧ ¬query
+    to CNF and checking that it is unsatisfiable.
+    """
+    from sat import entails
+    return entails(knowledge, query)
+
+
+def model_check_enumerate(knowledge, query):
+    """
+    Checks if knowledge base entails query by enumerating every model of
+    their symbols.
+    """
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
@@ -0,0 +1,458 @@
+"""
+CNF compilation and a CDCL SAT solver for logic sentences.
+
+`CNF` turns `Sentence` trees into clauses over integer literals (symbol
+variables are 1, 2, ...; -v is the negation of v) with the Tseitin
+transformation: every compound subsentence gets a fresh variable that
+is made equivalent to it, so the clauses grow linearly with the
+sentence instead of exponentially.
+
+`Solver` decides satisfiability by conflict-driven clause learning:
+unit propagation over two watched literals per clause, first-UIP
+conflict analysis with non-chronological backjumping, activity-ordered
+decisions with saved phases, and Luby restarts. Clauses and learned
+clauses persist between calls to `solve`, which can take assumptions,
+so one solver can answer many related queries.
+"""
+import heapq
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+
+class CNF():
+
+    def __init__(self):
+        self.variables = {}
+        self.names = {}
+        self.clauses = []
+        self.count = 0
+        self.true = None
+        # Tseitin literals of the compound sentences compiled so far, by
+        # id (the sentences are kept alive alongside)
+        self.definitions = {}
+
+    def new_variable(self, name=None):
+        self.count += 1
+        if name is not None:
+            self.variables[name] = self.count
+            self.names[self.count] = name
+        return self.count
+
+    def variable(self, name):
+        """Returns the variable of the symbol called `name`."""
+        if name not in self.variables:
+            return self.new_variable(name)
+        return self.variables[name]
+
+    def constant(self, value):
+        """Returns a literal that is always `value`."""
+        if self.true is None:
+            self.true = self.new_variable()
+            self.clauses.append([self.true])
+        return self.true if value else -self.true
+
+    def literal(self, sentence):
+        """
+        Returns a literal equivalent to `sentence`, adding the clauses
+        that define it.
+        """
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        if id(sentence) in self.definitions:
+            return self.definitions[id(sentence)][1]
+
+        if isinstance(sentence, (And, Or)):
+            parts = (sentence.conjuncts if isinstance(sentence, And)
+                     else sentence.disjuncts)
+            literals = [self.literal(part) for part in parts]
+            if not literals:
+                return self.constant(isinstance(sentence, And))
+            if len(literals) == 1:
+                return literals[0]
+            # An Or is the negation of an And of negated literals
+            sign = 1 if isinstance(sentence, And) else -1
+            v = self.new_variable()
+            for lit in literals:
+                self.clauses.append([-v * sign, lit * sign])
+            self.clauses.append([v * sign]
+                                + [-lit * sign for lit in literals])
+            lit = v
+        elif isinstance(sentence, Implication):
+            a = self.literal(sentence.antecedent)
+            c = self.literal(sentence.consequent)
+            lit = self.new_variable()
+            self.clauses.extend([[-lit, -a, c], [lit, a], [lit, -c]])
+        elif isinstance(sentence, Biconditional):
+            a = self.literal(sentence.left)
+            b = self.literal(sentence.right)
+            lit = self.new_variable()
+            self.clauses.extend([[-lit, -a, b], [-lit, a, -b],
+                                 [lit, a, b], [lit, -a, -b]])
+        else:
+            raise TypeError(f"cannot compile {type(sentence).__name__}")
+
+        self.definitions[id(sentence)] = (sentence, lit)
+        return lit
+
+    def add(self, sentence):
+        """
+        Adds clauses requiring `sentence` to be true. Conjunctions become
+        separate clauses and disjunctions single clauses, pushing
+        negations inward, so that only nested subsentences need Tseitin
+        variables.
+        """
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            self.clauses.append([self.literal(disjunct)
+                                 for disjunct in sentence.disjuncts])
+        elif isinstance(sentence, Implication):
+            self.clauses.append([-self.literal(sentence.antecedent),
+                                 self.literal(sentence.consequent)])
+        elif isinstance(sentence, Not):
+            operand = sentence.operand
+            if isinstance(operand, Not):
+                self.add(operand.operand)
+            elif isinstance(operand, Or):
+                for disjunct in operand.disjuncts:
+                    self.add(Not(disjunct))
+            elif isinstance(operand, And):
+                self.clauses.append([-self.literal(conjunct)
+                                     for conjunct in operand.conjuncts])
+            elif isinstance(operand, Implication):
+                self.add(operand.antecedent)
+                self.add(Not(operand.consequent))
+            else:
+                self.clauses.append([-self.literal(operand)])
+        else:
+            self.clauses.append([self.literal(sentence)])
+
+
+def luby(i):
+    """Returns the `i`th term (from 0) of the Luby sequence 1 1 2 1 1 2 4."""
+    size = 1
+    power = 0
+    while size < i + 1:
+        power += 1
+        size = 2 * size + 1
+    while size - 1 != i:
+        size = (size - 1) // 2
+        power -= 1
+        i %= size
+    return 2 ** power
+
+
+class Solver():
+
+    def __init__(self, clauses=()):
+        self.count = 0
+        # Per literal: 1 if true, -1 if false, 0 if unassigned; per
+        # variable (index 0 unused): the decision level and the clause that
+        # implied it
+        self.values = {}
+        self.levels = [0]
+        self.reasons = [None]
+        self.activity = [0.0]
+        self.phases = [False]
+        self.watches = {}
+        self.clauses = []
+        self.learned = []
+        self.trail = []
+        self.trail_limits = []
+        self.queue_head = 0
+        self.order = []
+        self.increment = 1.0
+        # Learned clauses kept before the longer half is dropped
+        self.max_learned = 1000
+        self.ok = True
+        self.model = None
+        self.conflicts = 0
+        self.decisions = 0
+        self.propagations = 0
+        for clause in clauses:
+            self.add_clause(clause)
+
+    def reserve(self, count):
+        """Makes room for variables up to `count`."""
+        while self.count < count:
+            self.count += 1
+            self.values[self.count] = self.values[-self.count] = 0
+            self.levels.append(0)
+            self.reasons.append(None)
+            self.activity.append(0.0)
+            self.phases.append(False)
+            self.watches[self.count] = []
+            self.watches[-self.count] = []
+            heapq.heappush(self.order, (0.0, self.count))
+
+    def value(self, lit):
+        return self.values[lit]
+
+    def add_clause(self, lits):
+        """
+        Adds a clause (a list of nonzero int literals). Returns False if
+        the clauses are now unsatisfiable.
+        """
+        if not self.ok:
+            return False
+        self._backtrack(0)
+        self.reserve(max((abs(lit) for lit in lits), default=0))
+        clause = []
+        for lit in lits:
+            value = self.value(lit)
+            if value == 1 or -lit in clause:
+                return True
+            if value == 0 and lit not in clause:
+                clause.append(lit)
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self._assign(clause[0], None)
+            self.ok = self._propagate() is None
+        else:
+            self._watch(clause)
+            self.clauses.append(clause)
+        return self.ok
+
+    def solve(self, assumptions=()):
+        """
+        Returns True if the clauses are satisfiable with every literal in
+        `assumptions` true, after which `model` maps each variable to its
+        value; False otherwise.
+        """
+        self.model = None
+        if not self.ok:
+            return False
+        self.reserve(max((abs(lit) for lit in assumptions), default=0))
+        restarts = 0
+        while True:
+            result = self._search(100 * luby(restarts), assumptions)
+            restarts += 1
+            if result is not None:
+                self._backtrack(0)
+                return result
+            if len(self.learned) > self.max_learned + len(self.clauses) // 3:
+                self._reduce()
+                self.max_learned = int(self.max_learned * 1.1)
+
+    def _search(self, budget, assumptions):
+        """
+        Runs CDCL until it finds a model (True), proves the clauses
+        unsatisfiable under the assumptions (False) or has had `budget`
+        conflicts (None, to restart).
+        """
+        conflicts = 0
+        while True:
+            conflict = self._propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                conflicts += 1
+                if not self.trail_limits:
+                    self.ok = False
+                    return False
+                learned, level = self._analyze(conflict)
+                self._backtrack(level)
+                if len(learned) == 1:
+                    self._assign(learned[0], None)
+                else:
+                    self._watch(learned)
+                    self.learned.append(learned)
+                    self._assign(learned[0], learned)
+                self.increment *= 1.05
+                continue
+
+            if conflicts >= budget:
+                self._backtrack(0)
+                return None
+
+            # Assumptions are the first decisions, one level each
+            lit = None
+            while len(self.trail_limits) < len(assumptions):
+                assumption = assumptions[len(self.trail_limits)]
+                value = self.value(assumption)
+                if value == -1:
+                    self._backtrack(0)
+                    return False
+                self.trail_limits.append(len(self.trail))
+                if value == 0:
+                    lit = assumption
+                    break
+            if lit is None:
+                lit = self._pick()
+                if lit is None:
+                    self.model = {v: self.values[v] == 1
+                                  for v in range(1, self.count + 1)}
+                    return True
+                self.trail_limits.append(len(self.trail))
+            self.decisions += 1
+            self._assign(lit, None)
+
+    def _pick(self):
+        """Returns the unassigned literal to decide next, or None."""
+        while self.order:
+            activity, v = heapq.heappop(self.order)
+            if self.values[v] == 0 and -activity == self.activity[v]:
+                return v if self.phases[v] else -v
+        # Entries can go stale before their variable is unassigned
+        for v in range(1, self.count + 1):
+            if self.values[v] == 0:
+                return v if self.phases[v] else -v
+        return None
+
+    def _watch(self, clause):
+        self.watches[clause[0]].append(clause)
+        self.watches[clause[1]].append(clause)
+
+    def _assign(self, lit, reason):
+        v = abs(lit)
+        self.values[lit] = 1
+        self.values[-lit] = -1
+        self.levels[v] = len(self.trail_limits)
+        self.reasons[v] = reason
+        self.trail.append(lit)
+
+    def _propagate(self):
+        """
+        Assigns every literal implied by unit clauses. Returns a clause
+        with all literals false if there is a conflict, else None.
+        """
+        values = self.values
+        watches = self.watches
+        while self.queue_head < len(self.trail):
+            false_lit = -self.trail[self.queue_head]
+            self.queue_head += 1
+            self.propagations += 1
+            watchers = watches[false_lit]
+            kept = []
+            for i, clause in enumerate(watchers):
+                # Keep the false literal second
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], false_lit
+                first = clause[0]
+                if values[first] == 1:
+                    kept.append(clause)
+                    continue
+                for j in range(2, len(clause)):
+                    lit = clause[j]
+                    if values[lit] != -1:
+                        clause[1], clause[j] = lit, false_lit
+                        watches[lit].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if values[first] == -1:
+                        kept.extend(watchers[i + 1:])
+                        watches[false_lit] = kept
+                        return clause
+                    self._assign(first, clause)
+            watches[false_lit] = kept
+        return None
+
+    def _analyze(self, conflict):
+        """
+        Returns the first-UIP clause learned from a conflict, asserting
+        literal first, and the level to backjump to.
+        """
+        level = len(self.trail_limits)
+        seen = set()
+        learned = [None]
+        pending = 0
+        lit = None
+        index = len(self.trail) - 1
+        clause = conflict
+        while True:
+            for q in clause:
+                v = abs(q)
+                if q == lit or v in seen or self.levels[v] == 0:
+                    continue
+                seen.add(v)
+                self._bump(v)
+                if self.levels[v] == level:
+                    pending += 1
+                else:
+                    learned.append(q)
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            lit = self.trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.reasons[abs(lit)]
+        learned[0] = -lit
+
+        backjump = 0
+        if len(learned) > 1:
+            # Watch the literal from the highest remaining level second
+            top = max(range(1, len(learned)),
+                      key=lambda i: self.levels[abs(learned[i])])
+            learned[1], learned[top] = learned[top], learned[1]
+            backjump = self.levels[abs(learned[1])]
+        return learned, backjump
+
+    def _reduce(self):
+        """
+        Forgets the longer half of the learned clauses (keeping binary
+        ones). Only called at level 0, where no learned clause is needed
+        as the reason for an assignment.
+        """
+        self.learned.sort(key=len)
+        half = len(self.learned) // 2
+        forget = {id(clause) for clause in self.learned[half:]
+                  if len(clause) > 2}
+        self.learned = [clause for clause in self.learned
+                        if id(clause) not in forget]
+        for lit, watchers in self.watches.items():
+            self.watches[lit] = [clause for clause in watchers
+                                 if id(clause) not in forget]
+
+    def _bump(self, v):
+        self.activity[v] += self.increment
+        if self.activity[v] > 1e100:
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.increment *= 1e-100
+            self.order = [(-self.activity[u], u)
+                          for u in range(1, self.count + 1)
+                          if self.values[u] == 0]
+            heapq.heapify(self.order)
+        elif self.values[v] == 0:
+            heapq.heappush(self.order, (-self.activity[v], v))
+
+    def _backtrack(self, level):
+        if len(self.trail_limits) <= level:
+            return
+        start = self.trail_limits[level]
+        for lit in self.trail[start:]:
+            v = abs(lit)
+            self.values[v] = self.values[-v] = 0
+            self.reasons[v] = None
+            self.phases[v] = lit > 0
+            heapq.heappush(self.order, (-self.activity[v], v))
+        del self.trail[start:]
+        del self.trail_limits[level:]
+        self.queue_head = len(self.trail)
+
+
+def satisfiable(sentence):
+    """
+    Returns a model of `sentence` as a dict of symbol name -> bool, or
+    None if it is unsatisfiable.
+    """
+    cnf = CNF()
+    cnf.add(sentence)
+    solver = Solver(cnf.clauses)
+    if not solver.solve():
+        return None
+    return {name: solver.model[v] for name, v in cnf.variables.items()}
+
+
+def entails(knowledge, query):
+    """Returns True if `knowledge` entails `query`: KB ∧ ¬query is UNSAT."""
+    cnf = CNF()
+    cnf.add(knowledge)
+    cnf.add(Not(query))
+    solver = Solver(cnf.clauses)
+    return not solver.solve()
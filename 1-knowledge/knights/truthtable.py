@@ -0,0 +1,226 @@
+"""
+Bit-parallel truth tables for logic sentences.
+
+`Program` compiles sentences into a flat list of instructions over
+registers, one per distinct subsentence. Models are numbered so that
+symbol i is true in model m when bit i of m is set, and a register
+holds an int with one bit per model: bit j is the subsentence's value
+in model first + j for the block starting at model `first`. Each
+instruction is then a single big-int operation over a whole block of up
+to 2 ** BLOCK_BITS models, so a truth table over n symbols takes
+2 ** (n - BLOCK_BITS) passes of the program instead of 2 ** n recursive
+`evaluate` calls.
+
+`entails_parallel` splits the models into 2 ** k cubes, one for each
+assignment to the last k symbols, so each cube is a contiguous range of
+model numbers, and checks the cubes across a process pool.
+"""
+import multiprocessing
+import os
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+BLOCK_BITS = 18
+
+SYMBOL = 0
+NOT = 1
+AND = 2
+OR = 3
+IMPLIES = 4
+IFF = 5
+
+# The program of each worker process in entails_parallel, and the event
+# set once any of them finds a counterexample
+worker_program = None
+worker_found = None
+
+
+class Program():
+
+    def __init__(self, *sentences, symbols=None):
+        """
+        Compiles `sentences`, over `symbols` (names, by default every
+        symbol in them, sorted) in that order.
+        """
+        if symbols is None:
+            symbols = sorted(set().union(*[
+                sentence.symbols() for sentence in sentences]))
+        self.symbols = list(symbols)
+        self.index = {name: i for i, name in enumerate(self.symbols)}
+        self.instructions = []
+        self.registers = {}
+        self.outputs = [self._compile(sentence) for sentence in sentences]
+
+    def _compile(self, sentence):
+        """Returns the register holding `sentence`, compiling it once."""
+        key = id(sentence)
+        if isinstance(sentence, Symbol):
+            key = sentence.name
+        if key in self.registers:
+            return self.registers[key][1]
+
+        if isinstance(sentence, Symbol):
+            if sentence.name not in self.index:
+                raise Exception(f"variable {sentence.name} not in model")
+            instruction = (SYMBOL, self.index[sentence.name])
+        elif isinstance(sentence, Not):
+            instruction = (NOT, self._compile(sentence.operand))
+        elif isinstance(sentence, And):
+            instruction = (AND, *[self._compile(conjunct)
+                                  for conjunct in sentence.conjuncts])
+        elif isinstance(sentence, Or):
+            instruction = (OR, *[self._compile(disjunct)
+                                 for disjunct in sentence.disjuncts])
+        elif isinstance(sentence, Implication):
+            instruction = (IMPLIES, self._compile(sentence.antecedent),
+                           self._compile(sentence.consequent))
+        elif isinstance(sentence, Biconditional):
+            instruction = (IFF, self._compile(sentence.left),
+                           self._compile(sentence.right))
+        else:
+            raise TypeError(f"cannot compile {type(sentence).__name__}")
+
+        register = len(self.instructions)
+        self.instructions.append(instruction)
+        # The sentence is kept alive so its id is not reused
+        self.registers[key] = (sentence, register)
+        return register
+
+    def blocks(self, start=0, stop=None):
+        """
+        Yields (first model, width, output values) for the blocks of
+        models covering `start` up to `stop` (by default all 2 ** n),
+        where output values holds one int per compiled sentence.
+        """
+        n = len(self.symbols)
+        if stop is None:
+            stop = 1 << n
+        bits = min(n, BLOCK_BITS)
+        width = 1 << bits
+        full = (1 << width) - 1
+        columns = symbol_columns(bits)
+        first = start - start % width
+        while first < stop:
+            values = self.run(first, columns, full)
+            yield first, width, [values[output] for output in self.outputs]
+            first += width
+
+    def run(self, first, columns, full):
+        """Returns the register values for the block starting at `first`."""
+        values = []
+        for op, *args in self.instructions:
+            if op == SYMBOL:
+                i = args[0]
+                if i < len(columns):
+                    value = columns[i]
+                else:
+                    value = full if first >> i & 1 else 0
+            elif op == NOT:
+                value = full ^ values[args[0]]
+            elif op == AND:
+                value = full
+                for arg in args:
+                    value &= values[arg]
+            elif op == OR:
+                value = 0
+                for arg in args:
+                    value |= values[arg]
+            elif op == IMPLIES:
+                value = (full ^ values[args[0]]) | values[args[1]]
+            else:
+                value = full ^ values[args[0]] ^ values[args[1]]
+            values.append(value)
+        return values
+
+    def model(self, number):
+        """Returns model `number` as a dict of symbol name -> bool."""
+        return {name: bool(number >> i & 1)
+                for i, name in enumerate(self.symbols)}
+
+
+def symbol_columns(bits):
+    """
+    Returns, for each of the first `bits` symbols, its values over a
+    block of 2 ** bits models: bit j is set when bit i of j is.
+    """
+    width = 1 << bits
+    columns = []
+    for i in range(bits):
+        # 2 ** i zeros then 2 ** i ones, doubled until it fills the block
+        column = ((1 << (1 << i)) - 1) << (1 << i)
+        length = 2 << i
+        while length < width:
+            column |= column << length
+            length *= 2
+        columns.append(column)
+    return columns
+
+
+def entails(knowledge, query):
+    """
+    Checks if knowledge base entails query by evaluating both in every
+    model, stopping at the first block with a counterexample.
+    """
+    program = Program(knowledge, query)
+    for _, _, (known, answer) in program.blocks():
+        if known & ~answer:
+            return False
+    return True
+
+
+def init_worker(knowledge, query, found):
+    global worker_program, worker_found
+    worker_program = Program(knowledge, query)
+    worker_found = found
+
+
+def check_cube(cube):
+    """
+    Returns the number of the first counter-model in `cube`, a (start,
+    stop) range of models, or None, giving up early once another worker
+    has found one.
+    """
+    start, stop = cube
+    for first, _, (known, answer) in worker_program.blocks(start, stop):
+        if worker_found.is_set():
+            return None
+        counter = known & ~answer
+        if counter:
+            worker_found.set()
+            return first + (counter & -counter).bit_length() - 1
+    return None
+
+
+def entails_parallel(knowledge, query, split=None, processes=None):
+    """
+    Checks if knowledge base entails query like `entails`, but with the
+    models split into 2 ** `split` cubes (by default about four per
+    process) checked across `processes` worker processes, which all stop
+    at their next block once one finds a counterexample. Every cube
+    covers at least a whole block, so small truth tables are checked in
+    this process instead.
+    """
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if split is None:
+        split = (4 * processes - 1).bit_length()
+    n = len(knowledge.symbols() | query.symbols())
+    split = min(split, n - BLOCK_BITS)
+    if split <= 0 or processes <= 1:
+        return entails(knowledge, query)
+
+    size = 1 << (n - split)
+    cubes = [(i * size, (i + 1) * size) for i in range(1 << split)]
+    found = multiprocessing.Event()
+    # Cubes left after a counterexample return at once, so the pool can
+    # drain rather than be terminated with tasks still queued
+    with multiprocessing.Pool(processes, init_worker,
+                              (knowledge, query, found)) as pool:
+        counters = list(pool.imap_unordered(check_cube, cubes))
+    return all(counter is None for counter in counters)
+
+
+def count_models(sentence):
+    """Returns the number of models of `sentence` over its symbols."""
+    program = Program(sentence)
+    return sum(values[0].bit_count() for _, _, values in program.blocks())
@@ -0,0 +1,98 @@
+"""
+Benchmarks for the minesweeper AI's inference.
+
+Plays seeded games with the AI choosing every move. When a random move
+hits a mine, the AI is told it is a mine and the game carries on, so
+each game uncovers the whole board and the knowledge base grows as far
+as it can.
+
+Usage: python benchmark.py [--board HEIGHTxWIDTH/MINES ...] [--games N]
+                           [--seed S]
+"""
+import argparse
+import random
+import statistics
+import time
+
+from minesweeper import Minesweeper, MinesweeperAI
+
+BOARDS = ["16x30/99", "100x100/1600"]
+
+
+def parse_board(text):
+    """Returns (height, width, mines) for a board like 16x30/99."""
+    size, mines = text.split("/")
+    height, width = size.split("x")
+    return int(height), int(width), int(mines)
+
+
+def play(height, width, mines, seed):
+    """
+    Plays one game and returns (seconds per add_knowledge call, seconds
+    per random move, mines hit, largest knowledge base).
+    """
+    random.seed(seed)
+    game = Minesweeper(height=height, width=width, mines=mines)
+    ai = MinesweeperAI(height=height, width=width, mines=mines,
+                       verbose=False)
+    times = []
+    guesses = []
+    hit = 0
+    largest = 0
+    while True:
+        move = ai.make_safe_move()
+        if move is None:
+            start = time.perf_counter()
+            move = ai.make_random_move()
+            guesses.append(time.perf_counter() - start)
+            if move is None:
+                break
+        if game.is_mine(move):
+            hit += 1
+            ai.mark_mine(move)
+            continue
+        nearby = game.nearby_mines(move)
+        start = time.perf_counter()
+        ai.add_knowledge(move, nearby)
+        times.append(time.perf_counter() - start)
+        largest = max(largest, len(ai.knowledge))
+    return times, guesses, hit, largest
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--board", action="append", type=parse_board,
+                        help="HEIGHTxWIDTH/MINES (default: "
+                             f"{' and '.join(BOARDS)})")
+    parser.add_argument("--games", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for height, width, mines in args.board or map(parse_board, BOARDS):
+        times = []
+        guesses = []
+        hits = []
+        largest = 0
+        for game in range(args.games):
+            game_times, game_guesses, hit, size = play(
+                height, width, mines, args.seed + game)
+            times += game_times
+            guesses += game_guesses
+            hits.append(hit)
+            largest = max(largest, size)
+        times.sort()
+        guesses.sort()
+        print(f"{height}x{width}/{mines}: {len(times)} moves in "
+              f"{sum(times):.2f}s, add_knowledge median "
+              f"{statistics.median(times) * 1000:.3f} ms, p99 "
+              f"{times[int(len(times) * 0.99)] * 1000:.3f} ms, max "
+              f"{times[-1] * 1000:.3f} ms; {statistics.fmean(hits):.1f} "
+              f"mines hit per game, up to {largest} sentences")
+        print(f"  {len(guesses)} random moves: median "
+              f"{statistics.median(guesses) * 1000:.3f} ms, p99 "
+              f"{guesses[int(len(guesses) * 0.99)] * 1000:.3f} ms, max "
+              f"{guesses[-1] * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
+import functools
 import itertools
+import math
 import random
+import sys
 
 
 class Minesweeper():
@@ -149,45 +152,373 @@ class Sentence():
         else:
             return True
 
+
+@functools.lru_cache(maxsize=1 << 16)
+def bit_indices(mask):
+    """
+    Returns the indices of the set bits of mask, lowest first. Sentence
+    masks are shifted down to their lowest cell, so the same few shapes
+    come up over and over.
+    """
+    indices = []
+    while mask:
+        low = mask & -mask
+        indices.append(low.bit_length() - 1)
+        mask ^= low
+    return tuple(indices)
+
+
+def normalize(offset, mask):
+    """
+    Returns (offset, mask) shifted so that the lowest set bit of mask
+    is bit 0.
+    """
+    if not mask:
+        return offset, mask
+    low = (mask & -mask).bit_length() - 1
+    return offset + low, mask >> low
+
+
+class BitSentence():
+    """
+    Logical statement about a Minesweeper game, like Sentence,
+    but with its cells as the bits of an int: cell (i, j) is bit
+    i * width + j - offset, where offset is the index of the
+    lowest cell, so subset checks, differences and counts are
+    single operations on ints a few rows wide.
+    """
+
+    __slots__ = ("offset", "mask", "count", "width", "safes", "mines")
+
+    def __init__(self, cells, count, width, offset=0):
+        """
+        Takes either an iterable of cells or, with offset, a mask.
+        """
+        if not isinstance(cells, int):
+            indices = [i * width + j for i, j in cells]
+            offset = min(indices, default=0)
+            cells = 0
+            for index in indices:
+                cells |= 1 << (index - offset)
+        self.offset, self.mask = normalize(offset, cells)
+        self.count = count
+        self.width = width
+        # Replaced rather than added to, so they can start out shared
+        self.safes = frozenset()
+        self.mines = frozenset()
+
+    def __eq__(self, other):
+        return (self.offset == other.offset and self.mask == other.mask
+                and self.count == other.count)
+
+    def __str__(self):
+        return f"{self.cells} = {self.count}"
+
+    @property
+    def cells(self):
+        return {divmod(self.offset + index, self.width)
+                for index in bit_indices(self.mask)}
+
+    def known_mines(self):
+        """
+        Returns the set of all cells in self.cells known to be mines.
+        """
+        return self.mines
+
+    def known_safes(self):
+        """
+        Returns the set of all cells in self.cells known to be safe.
+        """
+        return self.safes
+
+    def unknown(self):
+        return self.cells
+
+    def bit(self, cell):
+        """
+        Returns the bit for cell, or 0 if it's not in the sentence.
+        """
+        index = cell[0] * self.width + cell[1] - self.offset
+        return self.mask & (1 << index) if index >= 0 else 0
+
+    def mark_mine(self, cell):
+        """
+        Updates internal knowledge representation given the fact that
+        a cell is known to be a mine.
+        """
+        bit = self.bit(cell)
+        if bit:
+            if self.count<1:
+                return False
+            self.offset, self.mask = normalize(self.offset, self.mask ^ bit)
+            self.mines = self.mines | {cell}
+            self.count -= 1
+        return True
+
+    def mark_safe(self, cell):
+        """
+        Updates internal knowledge representation given the fact that
+        a cell is known to be safe.
+        """
+        bit = self.bit(cell)
+        if bit:
+            if self.mask.bit_count() < self.count:
+                return False
+            self.offset, self.mask = normalize(self.offset, self.mask ^ bit)
+            self.safes = self.safes | {cell}
+        return True
+
+
+def count_layouts(sentences):
+    """
+    Counts the ways to place mines in the cells of a connected group of
+    sentences, each a (cells, count) pair with cells a tuple of cell
+    indices, so that every sentence holds.
+
+    Returns the cells, in the order they were assigned, and a dict
+    mapping each possible number of mines to (ways, ways with each cell
+    a mine). Cells are assigned breadth first, so only a few sentences
+    are part-way through at once, and the counts for the rest of the
+    cells are memoized on how many mines those sentences still need.
+    """
+    touching = {}
+    for s, (cells, _) in enumerate(sentences):
+        for cell in cells:
+            touching.setdefault(cell, []).append(s)
+
+    # Start from a cell in the fewest sentences, likely an end of the group
+    start = min(touching, key=lambda cell: len(touching[cell]))
+    order = [start]
+    seen = {start}
+    for cell in order:
+        for s in touching[cell]:
+            for other in sentences[s][0]:
+                if other not in seen:
+                    seen.add(other)
+                    order.append(other)
+    position = {cell: p for p, cell in enumerate(order)}
+    first = [min(position[cell] for cell in cells) for cells, _ in sentences]
+    last = [max(position[cell] for cell in cells) for cells, _ in sentences]
+    started = [[] for _ in order]
+    for s in range(len(sentences)):
+        for p in range(first[s] + 1, last[s] + 1):
+            started[p].append(s)
+
+    remaining = [count for _, count in sentences]
+    unassigned = [len(cells) for cells, _ in sentences]
+    memo = {}
+
+    def solve(p):
+        if p == len(order):
+            return {0: (1, [])}
+        key = (p, tuple(remaining[s] for s in started[p]))
+        if key in memo:
+            return memo[key]
+        result = {}
+        for value in (0, 1):
+            for s in touching[order[p]]:
+                remaining[s] -= value
+                unassigned[s] -= 1
+            if all(0 <= remaining[s] <= unassigned[s]
+                   for s in touching[order[p]]):
+                for mines, (ways, cell_ways) in solve(p + 1).items():
+                    cell_ways = [ways * value] + cell_ways
+                    if mines + value in result:
+                        total, total_cells = result[mines + value]
+                        cell_ways = [a + b for a, b in
+                                     zip(total_cells, cell_ways)]
+                        ways += total
+                    result[mines + value] = (ways, cell_ways)
+            for s in touching[order[p]]:
+                remaining[s] += value
+                unassigned[s] += 1
+        memo[key] = result
+        return result
+
+    # solve recurses once per cell, which a long frontier could take past
+    # the default limit
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(limit, len(order) + 100))
+    try:
+        return order, solve(0)
+    finally:
+        sys.setrecursionlimit(limit)
+
+
+def convolve(a, b):
+    """
+    Returns the distribution of the total number of mines in two
+    independent groups, given each one's dict of mines -> ways.
+    """
+    result = {}
+    for m, x in a.items():
+        for n, y in b.items():
+            result[m + n] = result.get(m + n, 0) + x * y
+    return result
+
+
 class MinesweeperAI():
     """
     Minesweeper game player
     """
 
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, mines=None, verbose=True):
 
-        # Set initial height and width
+        # Set initial height and width, and the number of mines if known
         self.height = height
         self.width = width
+        self.total_mines = mines
+
+        # Whether to print the knowledge base after every move
+        self.verbose = verbose
 
-        # Keep track of which cells have been clicked on
+        # Keep track of which cells have been clicked on, and of the cells
+        # that could still be clicked on, with each one's place in the
+        # list so it can be removed in constant time
         self.moves_made = set()
         self.availiable = [(i,j) for i in range(height) for j in range(width)]
-        # Keep track of cells known to be safe or mines
+        self.availiable_index = {cell: k for k, cell
+                                 in enumerate(self.availiable)}
+        # Keep track of cells known to be safe or mines, and of the safe
+        # cells not clicked on yet
         self.mines = set()
         self.safes = set()
-        
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        self.safe_moves = set()
+
+        # BitSentences about the game known to be true, by their (offset,
+        # mask), and the keys containing each cell's index, so marking a
+        # cell or looking for subsets only touches sentences that share a
+        # cell. Sentences never hold cells known to be safe or mines.
+        self.knowledge = {}
+        self.containing = {}
+
+        # Keys of sentences added or changed since they were last used
+        # for inference
+        self.pending = []
+
+        # Layout counts of each group of sentences, by the group's
+        # sentences, kept from one random move to the next
+        self.layouts = {}
+
+    def make_unavailable(self, cell):
+        """
+        Removes a cell from the cells that could still be clicked on.
+        """
+        k = self.availiable_index.pop(cell)
+        last = self.availiable.pop()
+        if k < len(self.availiable):
+            self.availiable[k] = last
+            self.availiable_index[last] = k
+
+    def add_sentence(self, sentence):
+        """
+        Adds a BitSentence, unless it is empty or the knowledge base
+        already has one about the same cells.
+        """
+        key = (sentence.offset, sentence.mask)
+        if not sentence.mask or key in self.knowledge:
+            return
+        self.knowledge[key] = sentence
+        for index in bit_indices(sentence.mask):
+            self.containing.setdefault(sentence.offset + index, set()).add(key)
+        self.pending.append(key)
+
+    def remove_sentence(self, key):
+        """
+        Removes the sentence with (offset, mask) `key` and returns it.
+        """
+        offset, mask = key
+        for index in bit_indices(mask):
+            keys = self.containing[offset + index]
+            keys.discard(key)
+            if not keys:
+                del self.containing[offset + index]
+        return self.knowledge.pop(key)
 
     def mark_mine(self, cell):
         """
         Marks a cell as a mine, and updates all knowledge
         to mark that cell as a mine as well.
         """
+        if cell in self.mines:
+            return
         self.mines.add(cell)
-        for sentence in self.knowledge:
+        self.make_unavailable(cell)
+        index = cell[0] * self.width + cell[1]
+        for key in list(self.containing.get(index, ())):
+            sentence = self.remove_sentence(key)
             sentence.mark_mine(cell)
+            self.add_sentence(sentence)
 
     def mark_safe(self, cell):
         """
         Marks a cell as safe, and updates all knowledge
         to mark that cell as safe as well.
         """
+        if cell in self.safes:
+            return
         self.safes.add(cell)
-        for sentence in self.knowledge:
+        if cell not in self.moves_made:
+            self.safe_moves.add(cell)
+        index = cell[0] * self.width + cell[1]
+        for key in list(self.containing.get(index, ())):
+            sentence = self.remove_sentence(key)
             sentence.mark_safe(cell)
-    
+            self.add_sentence(sentence)
+
+    def infer(self):
+        """
+        Draws conclusions from pending sentences until there are none:
+        marks every cell of a sentence with no mines as safe, and every
+        cell of a sentence that is all mines as a mine, and replaces a
+        sentence that has another one's cells as a subset with their
+        difference.
+        """
+        while self.pending:
+            key = self.pending.pop()
+            sentence = self.knowledge.get(key)
+            if sentence is None:
+                continue
+            if sentence.count == 0 or sentence.count == key[1].bit_count():
+                self.remove_sentence(key)
+                if sentence.count == 0:
+                    mark = self.mark_safe
+                else:
+                    mark = self.mark_mine
+                for cell in sentence.cells:
+                    mark(cell)
+                continue
+
+            # Any sentence that is a subset or superset of this one shares
+            # all of the smaller one's cells
+            offset, mask = key
+            others = set().union(*[self.containing[offset + index]
+                                   for index in bit_indices(mask)])
+            others.discard(key)
+            for other in others:
+                if other not in self.knowledge:
+                    continue
+                # Line both masks up on the lower offset
+                if offset >= other[0]:
+                    base, ours, theirs = (other[0], mask << offset - other[0],
+                                          other[1])
+                else:
+                    base, ours, theirs = (offset, mask,
+                                          other[1] << other[0] - offset)
+                common = ours & theirs
+                if common == ours:
+                    superset = self.remove_sentence(other)
+                    self.add_sentence(BitSentence(
+                        theirs ^ ours, superset.count - sentence.count,
+                        self.width, base))
+                elif common == theirs:
+                    subset = self.knowledge[other]
+                    self.remove_sentence(key)
+                    self.add_sentence(BitSentence(
+                        ours ^ theirs, sentence.count - subset.count,
+                        self.width, base))
+                    break
+
     def add_knowledge(self, cell, count):
         """
         Called when the Minesweeper board tells us, for a given
@@ -204,77 +535,26 @@ class MinesweeperAI():
                if they can be inferred from existing knowledge
         """
         self.moves_made.add(cell)
-        self.availiable.remove(cell)
-        self.safes.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
+        self.make_unavailable(cell)
+        self.safe_moves.discard(cell)
+        self.mark_safe(cell)
         x,y = cell
         add_cells = []
         for i in range(max(0,x-1),min(x+2,self.height)):
             for j in range(max(0,y-1),min(y+2,self.width)):
-                add_cells.append((i,j))
-        new_sentence = Sentence(add_cells,count)
-        for scell in add_cells:
-            if scell in self.safes:
-                new_sentence.mark_safe(scell)
-            if scell in self.mines:
-                new_sentence.mark_mine(scell)
-        self.knowledge.append(new_sentence)
-        todo_list = self.knowledge.copy()
-        updated_list = []
-        safes = []
-        mines = []
-        while len(todo_list):
-            ref = todo_list.pop()
-            #print("Pop point: ",ref)
-            tobe_add = []
-            tobe_remove = []
-            if ref.count==0:
-                for tmp_cell in ref.cells:
-                    for kwlg in todo_list:
-                        kwlg.mark_safe(tmp_cell)
-                    safes.append(tmp_cell)
-                    #self.mark_safe(tmp_cell)
-                continue
-            elif len(ref.cells)==ref.count:
-                for tmp_cell in ref.cells:
-                    for kwlg in todo_list:
-                        kwlg.mark_mine(tmp_cell)
-                    mines.append(tmp_cell)
-                    #self.mark_mine(tmp_cell)
-                continue
-            elif len(ref.cells)==0:
-                continue
-            orth = True
-            for stc in todo_list:
-                if ref.cells.issubset(stc.cells):
-                    if ref!=stc:
-                        tobe_add.append(Sentence(stc.cells - ref.cells,stc.count - ref.count))
-                        tobe_remove.append(stc)
-                    else:
-                        tobe_remove.append(stc)
-                elif stc.cells.issubset(ref.cells):
-                    orth = False
-                    tobe_add.append(Sentence(ref.cells - stc.cells,ref.count - stc.count))
-            
-            if orth:
-                updated_list.append(ref)
-            for rm in tobe_remove:
-                todo_list.remove(rm)
-            for ad in tobe_add:
-                todo_list.append(ad)
-        for safecell in safes:
-            self.mark_safe(safecell)
-        for minecell in mines:
-            self.availiable.remove(minecell)
-            self.mark_mine(minecell)
-        print("Safes: ",self.safes)
-        print("Mines: ",self.mines)
-        self.knowledge = updated_list
-        print("Knowledge")
-        for kwlg in self.knowledge:
-            print(kwlg)
-                    
+                if (i,j) in self.mines:
+                    count -= 1
+                elif (i,j) not in self.safes:
+                    add_cells.append((i,j))
+        self.add_sentence(BitSentence(add_cells,count,self.width))
+        self.infer()
+        if self.verbose:
+            print("Safes: ",self.safes)
+            print("Mines: ",self.mines)
+            print("Knowledge")
+            for kwlg in self.knowledge.values():
+                print(kwlg)
+
     def make_safe_move(self):
         """
         Returns a safe cell to choose on the Minesweeper board.
@@ -284,20 +564,134 @@ class MinesweeperAI():
         This function may use the knowledge in self.mines, self.safes
         and self.moves_made, but should not modify any of those values.
         """
-        for i in range(self.width):
-            for j in range(self.height):
-                if (i,j) not in self.moves_made and (i,j) in self.safes:
-                    return (i,j)
+        for cell in self.safe_moves:
+            return cell
         return None
 
+    def mine_probabilities(self):
+        """
+        Returns the probability that each cell in a sentence is a mine,
+        as a dict, and the probability that any other unknown cell is,
+        with every layout of mines that fits the knowledge base (and the
+        number of mines, if known) equally likely. Returns None if no
+        layout fits.
+
+        Sentences that share no cells, even through other sentences, are
+        counted separately and combined by how many ways the mines left
+        over can be spread over the cells outside every sentence.
+        """
+        # Group sentences that are connected through shared cells
+        groups = []
+        seen = set()
+        for key in self.knowledge:
+            if key in seen:
+                continue
+            seen.add(key)
+            group = [key]
+            for offset, mask in group:
+                for index in bit_indices(mask):
+                    for other in self.containing[offset + index]:
+                        if other not in seen:
+                            seen.add(other)
+                            group.append(other)
+            groups.append(group)
+
+        layouts = {}
+        counted = []
+        for group in groups:
+            signature = frozenset((key, self.knowledge[key].count)
+                                  for key in group)
+            if signature not in self.layouts:
+                self.layouts[signature] = count_layouts([
+                    (tuple(offset + index for index in bit_indices(mask)),
+                     count) for (offset, mask), count in signature])
+            layouts[signature] = self.layouts[signature]
+            counted.append(layouts[signature])
+        # Only keep the groups still in the knowledge base
+        self.layouts = layouts
+
+        frontier = sum(len(order) for order, _ in counted)
+        outside = (self.height * self.width - len(self.safes) - len(self.mines)
+                   - frontier)
+        if self.total_mines is None:
+            left = None
+        else:
+            left = self.total_mines - len(self.mines)
+
+        def weight(mines):
+            """Ways to place the other mines outside every sentence."""
+            if left is None:
+                return 1
+            if not 0 <= left - mines <= outside:
+                return 0
+            return math.comb(outside, left - mines)
+
+        # The distribution of mines in every group but each one
+        distributions = [{m: ways for m, (ways, _) in found.items()}
+                         for _, found in counted]
+        before = [{0: 1}]
+        for distribution in distributions:
+            before.append(convolve(before[-1], distribution))
+        after = [{0: 1}]
+        for distribution in reversed(distributions):
+            after.append(convolve(after[-1], distribution))
+        after.reverse()
+
+        total = sum(ways * weight(m) for m, ways in before[-1].items())
+        if total == 0:
+            return None
+        probabilities = {}
+        for k, (order, found) in enumerate(counted):
+            others = convolve(before[k], after[k + 1])
+            mine_ways = [0] * len(order)
+            for m, (_, cell_ways) in found.items():
+                factor = sum(ways * weight(m + n)
+                             for n, ways in others.items())
+                for i, ways in enumerate(cell_ways):
+                    mine_ways[i] += ways * factor
+            for index, ways in zip(order, mine_ways):
+                probabilities[divmod(index, self.width)] = ways / total
+
+        if not outside:
+            rest = None
+        elif left is None:
+            # Without a mine count, guess the density of the frontier
+            rest = (sum(probabilities.values()) / len(probabilities)
+                    if probabilities else 0.5)
+        else:
+            # Each of the outside cells holds a mine in left - m of every
+            # outside * weight(m) ways to spread the rest
+            rest = sum(ways * weight(m) * (left - m)
+                       for m, ways in before[-1].items()) / (outside * total)
+        return probabilities, rest
+
     def make_random_move(self):
         """
         Returns a move to make on the Minesweeper board.
         Should choose randomly among cells that:
             1) have not already been chosen, and
             2) are not known to be mines
+        Chooses the cell least likely to be a mine, at random among
+        equally likely ones.
         """
-        if len(self.availiable):
-            return self.availiable[random.randint(0,len(self.availiable)-1)]
-        else:
-            print("Done!")
+        if not len(self.availiable):
+            if self.verbose:
+                print("Done!")
+            return None
+        found = self.mine_probabilities()
+        if found is None:
+            return random.choice(self.availiable)
+        probabilities, rest = found
+
+        best = min(probabilities.values(), default=1)
+        if rest is not None and rest <= best:
+            # Any cell outside every sentence, found by trying random ones
+            while True:
+                cell = random.choice(self.availiable)
+                if cell not in probabilities and cell not in self.safes:
+                    return cell
+        if not probabilities:
+            # Every cell left is known to be safe
+            return random.choice(self.availiable)
+        return random.choice([cell for cell, p in probabilities.items()
+                              if p <= best + 1e-12])
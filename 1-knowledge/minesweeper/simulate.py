@@ -0,0 +1,143 @@
+"""
+Headless batch simulator for the minesweeper AI.
+
+Plays seeded games of Minesweeper against MinesweeperAI across a process
+pool, with the AI's printing turned off, and reports the win rate,
+moves per second and per-move inference latency percentiles for each
+board. A game is lost when the AI clicks a mine and won once every safe
+cell has been clicked. A move's latency covers choosing it and adding
+what it revealed to the knowledge base, and moves per second are over
+that time alone.
+
+Usage: python simulate.py [--board HEIGHTxWIDTH/MINES ...] [--games N]
+                          [--processes N] [--seed S] [--report FILE]
+"""
+import argparse
+import json
+import multiprocessing
+import random
+import sys
+import time
+
+from benchmark import parse_board
+from minesweeper import Minesweeper, MinesweeperAI
+
+BOARDS = ["9x9/10", "16x16/40", "16x30/99", "50x50/250", "50x50/500"]
+
+
+def play_game(task):
+    """
+    Plays one game and returns its record: whether it was won, and the
+    seconds taken by each move and whether it was a guess.
+    """
+    height, width, mines, seed = task
+    random.seed(seed)
+    game = Minesweeper(height=height, width=width, mines=mines)
+    ai = MinesweeperAI(height=height, width=width, mines=mines,
+                       verbose=False)
+    moves = []
+    won = False
+    while True:
+        start = time.perf_counter()
+        move = ai.make_safe_move()
+        guess = move is None
+        if guess:
+            move = ai.make_random_move()
+            if move is None:
+                break
+        if game.is_mine(move):
+            moves.append((time.perf_counter() - start, guess))
+            break
+        ai.add_knowledge(move, game.nearby_mines(move))
+        moves.append((time.perf_counter() - start, guess))
+        if len(ai.moves_made) == height * width - mines:
+            won = True
+            break
+    return {"seed": seed, "won": won, "moves": moves}
+
+
+def run_simulation(games, height, width, mines, processes=None, seed=0,
+                   chunksize=8):
+    """
+    Plays `games` games on one board across a process pool and returns
+    their records in order.
+    """
+    rng = random.Random(seed)
+    tasks = [(height, width, mines, rng.getrandbits(32))
+             for _ in range(games)]
+    with multiprocessing.Pool(processes) as pool:
+        return pool.map(play_game, tasks, chunksize)
+
+
+def percentile(values, q):
+    """Returns the `q`th percentile of sorted `values` (nearest rank)."""
+    if not values:
+        return None
+    rank = round(q / 100 * len(values))
+    return values[min(len(values) - 1, max(0, rank - 1))]
+
+
+def summarize(board, records, elapsed):
+    """Returns a dict of the win rate and move statistics for a board."""
+    latencies = sorted(seconds * 1000 for record in records
+                       for seconds, _ in record["moves"])
+    guesses = sum(guess for record in records
+                  for _, guess in record["moves"])
+    thinking = sum(latencies) / 1000
+    return {
+        "board": board,
+        "games": len(records),
+        "won": sum(record["won"] for record in records),
+        "win_rate": sum(record["won"] for record in records)
+                    / max(len(records), 1),
+        "seconds": elapsed,
+        "moves": len(latencies),
+        "guesses": guesses,
+        "moves_per_second": len(latencies) / max(thinking, 1e-9),
+        "latency_ms": {
+            "p50": percentile(latencies, 50),
+            "p90": percentile(latencies, 90),
+            "p99": percentile(latencies, 99),
+            "max": latencies[-1] if latencies else None
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--board", action="append", type=parse_board,
+                        help="HEIGHTxWIDTH/MINES, may be repeated (default: "
+                             f"{', '.join(BOARDS)})")
+    parser.add_argument("--games", type=int, default=200,
+                        help="games per board")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="worker processes (default: one per core)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--report", metavar="FILE",
+                        help="write a JSON report")
+    args = parser.parse_args()
+
+    summaries = []
+    for height, width, mines in args.board or map(parse_board, BOARDS):
+        board = f"{height}x{width}/{mines}"
+        start = time.perf_counter()
+        records = run_simulation(args.games, height, width, mines,
+                                 args.processes, args.seed)
+        summary = summarize(board, records, time.perf_counter() - start)
+        summaries.append(summary)
+
+        latency = summary["latency_ms"]
+        print(f"{board}: won {summary['won']}/{summary['games']} "
+              f"({summary['win_rate']:.1%}) in {summary['seconds']:.1f}s; "
+              f"{summary['moves']} moves ({summary['guesses']} guesses), "
+              f"{summary['moves_per_second']:.0f} moves/s; latency "
+              f"p50 {latency['p50']:.3f} ms, p90 {latency['p90']:.3f} ms, "
+              f"p99 {latency['p99']:.3f} ms, max {latency['max']:.3f} ms")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump({"boards": summaries}, f, indent=1)
+        print(f"Wrote {args.report}.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""
+Tests for MinesweeperAI's random moves.
+
+Usage: python -m unittest test_minesweeper
+"""
+import unittest
+
+from minesweeper import MinesweeperAI
+
+
+class RandomMoveTest(unittest.TestCase):
+
+    def test_only_safe_cells_left(self):
+        ai = MinesweeperAI(2, 2, verbose=False)
+        ai.add_knowledge((0, 0), 0)
+        move = ai.make_random_move()
+        self.assertIn(move, {(0, 1), (1, 0), (1, 1)})
+        self.assertIn(move, ai.safes)
+
+    def test_only_safe_cells_left_with_mine_count(self):
+        ai = MinesweeperAI(2, 2, mines=0, verbose=False)
+        ai.add_knowledge((0, 0), 0)
+        self.assertIn(ai.make_random_move(), {(0, 1), (1, 0), (1, 1)})
+
+    def test_no_cells_left(self):
+        ai = MinesweeperAI(1, 2, verbose=False)
+        ai.add_knowledge((0, 0), 1)
+        self.assertIsNone(ai.make_random_move())
+
+
+if __name__ == "__main__":
+    unittest.main()